@@ -1,12 +1,20 @@
+import asyncio
 import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
 import re
-import time
-from markdownify import markdownify as md
+from markdownify import MarkdownConverter
 import os
+import hashlib
+import itertools
+import queue
+import threading
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlencode, urljoin, urlparse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.etree
+import lxml.html
 import uuid
 from datetime import datetime, timedelta
 import logging
@@ -29,16 +37,57 @@ console_formatter = logging.Formatter('%(levelname)s - %(message)s')
 console_handler.setFormatter(console_formatter)
 logger.addHandler(console_handler)
 
+BELTA_BASE_URL = "http://belta.by"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Listing pages are only mined for links, so they go straight through lxml XPath
+PAGES_XPATH = '(//div[contains(concat(" ", normalize-space(@class), " "), " pages_inner ")])[1]//a/@href'
+ARTICLE_LINKS_XPATH = '//a[contains(concat(" ", normalize-space(@class), " "), " rubric_item_title ")]/@href'
+
+# Parse only the subtrees the article extractor actually reads
+ARTICLE_STRAINER = SoupStrainer(['title', 'div'])
+
+# Walks the parsed soup directly, skipping the str(soup) -> re-parse round trip.
+# Options are read-only after construction, so one instance is shared by all threads.
+MD_CONVERTER = MarkdownConverter(heading_style="ATX")
+
+# Shared HTTP session: every request goes to belta.by, so keep-alive connections
+# are reused across threads instead of doing a new TCP+TLS handshake per page.
+# pool_maxsize must stay >= the number of worker threads hitting the session.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({"User-Agent": USER_AGENT})
+
+_INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\s]')
+_UNDERSCORE_RUNS = re.compile(r'_+')
+
+# Directories already created by this process; skips a stat per image/article
+_ENSURED_DIRS: set[str] = set()
+_DIR_LOCK = threading.Lock()
+
+def ensure_dir(path):
+    """os.makedirs(path, exist_ok=True), done at most once per path per process."""
+    if path in _ENSURED_DIRS:
+        return
+    os.makedirs(path, exist_ok=True)
+    with _DIR_LOCK:
+        _ENSURED_DIRS.add(path)
+
 def sanitize_filename(name):
     # Replace common problematic whitespace
     name = name.replace('\xa0', ' ').strip()
-    # Replace invalid characters with underscore
-    name = re.sub(r'[<>:"/\\|?*]', '_', name)
-    # Optional: collapse multiple underscores/spaces
-    name = re.sub(r'_+', '_', name)
     # Remove leading/trailing dots or spaces (to be extra safe)
     name = name.strip('. ')
-    name = name.replace(" ", "_").replace("\r", '_').replace("\n", '_')
+    # Replace invalid characters and whitespace (spaces, \r, \n) with underscore
+    name = _INVALID_FILENAME_CHARS.sub('_', name)
+    # Optional: collapse multiple underscores/spaces
+    name = _UNDERSCORE_RUNS.sub('_', name)
     # Fallback if empty
     if not name:
         name = "unnamed"
@@ -62,13 +111,8 @@ def generate_date_strings(start_str, end_str, fmt="%d.%m.%Y"):
     if start > end:
         raise ValueError("Start date must be on or before end date.")
     
-    date_list = []
-    current = start
-    while current <= end:
-        date_list.append(current.strftime(fmt))
-        current += timedelta(days=1)
-    
-    return date_list
+    day_count = (end - start).days + 1
+    return [(start + timedelta(days=offset)).strftime(fmt) for offset in range(day_count)]
 
 
 def build_belta_url(**kwargs):
@@ -88,22 +132,17 @@ def build_belta_url(**kwargs):
 
 
 
-def get_pages_links(search_url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
+def parse_pages_links(content):
+    """Extract absolute pagination links from a search results page body."""
+    tree = lxml.html.fromstring(content)
+    return [urljoin(BELTA_BASE_URL, str(href)) for href in tree.xpath(PAGES_XPATH)]
+
 
+def get_pages_links(search_url):
     try:
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = SESSION.get(search_url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        pages_container = soup.find('div', class_='pages_inner')
-        page_links = []
-        if pages_container:
-            links_tags = pages_container.find_all('a')
-            # logger.debug(pages_container)
-            for item in links_tags:
-                page_links.append("http://belta.by" + str(item['href']))
+        page_links = parse_pages_links(response.content)
         
         # for item in links_container:
         #     a_tag = item.find('a', href=True)
@@ -115,7 +154,7 @@ def get_pages_links(search_url):
         return page_links
         # logger.debug(type(links), links, sep="\n")
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, lxml.etree.ParserError) as e:
         logger.error(f"Request failed: {e}")
         return []
     
@@ -153,49 +192,91 @@ def fetch_all_article_links(page_urls, max_workers=10):
     return all_links
     
     
+def parse_article_links(content):
+    """Extract unique absolute article links from a results page body."""
+    tree = lxml.html.fromstring(content)
+    return list({urljoin(BELTA_BASE_URL, str(href)) for href in tree.xpath(ARTICLE_LINKS_XPATH)})
+
+
 def get_article_links(page_url):
     # logger.debug(f"⚠️ Getting {page_url}")
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-
     try:
-        response = requests.get(page_url, headers=headers, timeout=10)
+        response = SESSION.get(page_url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        articles_links = set()
-        links = soup.find_all('a', class_="rubric_item_title", href=True)
-        for link in links:
-            if link:
-                articles_links.add(link['href'])
         # Removed logging to prevent interference with progress bar
-        return list(articles_links)
+        return parse_article_links(response.content)
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, lxml.etree.ParserError) as e:
         logger.error(f"Request failed: {e}")
         return []
 
 
 
+def stream_to_file(url, path):
+    """
+    Stream a remote file straight to disk instead of buffering it in memory.
+
+    Returns:
+        str: SHA-1 hex digest of the written bytes.
+    """
+    digest = hashlib.sha1()
+    with SESSION.get(url, stream=True, timeout=10) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        with open(path, "wb") as f:
+            for block in iter(lambda: response.raw.read(64 * 1024), b""):
+                digest.update(block)
+                f.write(block)
+    return digest.hexdigest()
+
+
+# Template images (logos, avatars, banners) repeat across thousands of articles,
+# so each remote URL is fetched once and stored under a content-addressed name.
+_IMG_CACHE: dict[tuple[str, str], str] = {}
+_IMG_LOCK = threading.Lock()
+
+
+def fetch_image_cached(full_url, save_dir):
+    """Download an image once per URL and return its local, content-addressed path."""
+    key = (save_dir, full_url)
+    with _IMG_LOCK:
+        cached = _IMG_CACHE.get(key)
+    if cached:
+        return cached
+
+    ext = os.path.splitext(urlparse(full_url).path)[1] or ".jpg"
+    tmp_path = os.path.join(save_dir, f".{uuid.uuid4().hex}.part")
+    try:
+        digest = stream_to_file(full_url, tmp_path)
+        img_path = os.path.join(save_dir, digest[:16] + ext)
+        if os.path.exists(img_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, img_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    with _IMG_LOCK:
+        _IMG_CACHE[key] = img_path
+    return img_path
+
+
 def download_image(img_url, base_url, save_dir="images"):
     full_url = urljoin(base_url, img_url)
-    os.makedirs(save_dir, exist_ok=True)
+    ensure_dir(save_dir)
     
     try:
-        img_data = requests.get(full_url, timeout=10).content
-        img_name = str(uuid.uuid4()) + os.path.splitext(urlparse(full_url).path or ".jpg")[1]
-        img_path = os.path.join(save_dir, img_name)
-        with open(img_path, "wb") as f:
-            f.write(img_data)
-        return os.path.join(save_dir, img_name)
+        return fetch_image_cached(full_url, save_dir)
     except Exception as e:
         logger.error(f"Failed to download {img_url}: {e}")
         return None
 
 def html_to_markdown_with_local_images(html_str: str, base_url: str, md_img_dir: str = "images") -> str:
-    os.makedirs(md_img_dir, exist_ok=True)
+    ensure_dir(md_img_dir)
     # Parse the HTML string
-    soup = BeautifulSoup(html_str, 'html.parser')
+    soup = BeautifulSoup(html_str, 'lxml')
     
     # Download and replace images
     for img in soup.find_all('img'):
@@ -208,60 +289,106 @@ def html_to_markdown_with_local_images(html_str: str, base_url: str, md_img_dir:
             continue  # skip invalid URLs
 
         try:
-            img_data = requests.get(full_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10).content
-            os.makedirs(md_img_dir, exist_ok=True)
-            
-            ext = os.path.splitext(full_url.split('?')[0].split('/')[-1])[1] or '.jpg'
-            filename = f"{uuid.uuid4().hex}{ext}"
-            img_path = os.path.join(md_img_dir, filename)
-            with open(img_path, 'wb') as f:
-                f.write(img_data)
-            
             # Replace src with relative path
-            img['src'] = os.path.join(md_img_dir, filename)
+            img['src'] = fetch_image_cached(full_url, md_img_dir)
             
         except Exception as e:
             logger.warning(f"⚠️ Failed to download image {full_url}: {e}")
 
     # Convert to Markdown
-    return md(str(soup), heading_style="ATX")
+    return MD_CONVERTER.convert_soup(soup)
+
+
+
+def write_markdown_file(file_path, text):
+    """
+    Write text to a new file at file_path and return the path actually used.
+    If the name is taken, a short content-hash suffix is tried next and then _1, _2, ...
+    Files are created with O_EXCL, so the check and the create are one atomic syscall
+    and concurrent writers (threads or processes) never overwrite each other.
+    """
+    name, ext = os.path.splitext(file_path)
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:6]
+    candidates = itertools.chain(
+        [file_path, f"{name}_{digest}{ext}"],
+        (f"{name}_{digest}_{counter}{ext}" for counter in itertools.count(1)),
+    )
+    for candidate in candidates:
+        try:
+            fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        return candidate
+
+
+class BackgroundWriter:
+    """
+    Single daemon thread that owns Markdown file writes.
+
+    Producers hand off (path, text) and go back to fetching/parsing instead of
+    blocking on the filesystem; the writer drains the queue in order.
+    """
 
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="md-writer", daemon=True)
+        self._thread.start()
+
+    def submit_write(self, file_path, text):
+        self._queue.put((file_path, text))
+
+    def close(self):
+        """Flush every pending write and stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            file_path, text = item
+            try:
+                write_markdown_file(file_path, text)
+            except OSError as e:
+                logger.error(f"OS error saving file: {e}")
+
+
+def write_article(page_content, folder, writer=None):
+    """
+    Convert an article page body to Markdown and save it under folder.
+    If a BackgroundWriter is given the write is queued on it, otherwise it happens inline.
+    """
+    soup = BeautifulSoup(page_content, 'lxml', parse_only=ARTICLE_STRAINER)
+    # with open("page.html", "w", encoding="utf-8") as f:
+    #     f.write(response.text)
+    title = soup.find('title')
+    title = sanitize_filename(str(title.contents[0])) if title else f"no_title_{uuid.uuid4()}"
+
+    # Ensure the title is not too long for OS limitations
+    if len(title) > 200:  # Windows has path limitations
+        title = title[:200]
+
+    content = soup.find('div', class_="text_block")
+    if content:
+        mark_down_content = MD_CONVERTER.convert_soup(content)
+
+        # Create the file path safely
+        file_path = os.path.join(folder, f"{title}.md")
+
+        if writer is not None:
+            writer.submit_write(file_path, mark_down_content)
+        else:
+            write_markdown_file(file_path, mark_down_content)
 
 
 def save_page_content(url, folder):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = SESSION.get(url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # with open("page.html", "w", encoding="utf-8") as f:
-        #     f.write(response.text)
-        title = soup.find('title')
-        title = sanitize_filename(str(title.contents[0])) if title else f"no_title_{uuid.uuid4()}"
-
-        # Ensure the title is not too long for OS limitations
-        if len(title) > 200:  # Windows has path limitations
-            title = title[:200]
-
-        content = soup.find('div', class_="text_block")
-        if content:
-            mark_down_content = md(str(content), heading_style="ATX")
-
-            # Create the file path safely
-            file_path = os.path.join(folder, f"{title}.md")
-
-            # Handle potential file name conflicts by appending a number
-            counter = 1
-            original_file_path = file_path
-            while os.path.exists(file_path):
-                name, ext = os.path.splitext(original_file_path)
-                file_path = f"{name}_{counter}{ext}"
-                counter += 1
-
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(mark_down_content)
+        write_article(response.content, folder)
 
     except requests.exceptions.RequestException as e:
         logger.error(f"Request failed: {e}")
@@ -276,25 +403,38 @@ def save_page_content(url, folder):
 
 
 
-def download_all_from_period(from_day="01.12.2024", to_day="01.12.2024", worker_count=10, worker_timeout=0.0):
-    url = build_belta_url(from_day=from_day, to_day=to_day)
-    logger.debug(f"Processing {from_day}")
-    logger.debug(f"Using URL {url}")
-
-    pages = get_pages_links(url)
-    total_links = []
-
+def prepare_date_dir(from_day):
+    """Create (if needed) and return the ./data/<year>/<date> directory for a day."""
     # Extract year from from_day to create year directory
     date_parts = from_day.split('.')
     year = date_parts[2] if len(date_parts) == 3 else "unknown_year"
 
     # Create data/year directory
     year_dir = f"./data/{year}"
-    os.makedirs(year_dir, exist_ok=True)
+    ensure_dir(year_dir)
 
     # Create date-specific directory (e.g., 10.10.2011)
     date_dir = os.path.join(year_dir, from_day)
-    os.makedirs(date_dir, exist_ok=True)
+    ensure_dir(date_dir)
+    return date_dir
+
+
+def collect_article_jobs_sync(from_day="01.12.2024", to_day="01.12.2024"):
+    """
+    Collect article download jobs for a period, with blocking requests. Downloads nothing itself;
+    the crawler driver uses the async collect_article_jobs instead.
+
+    Returns:
+        list[tuple[str, str]]: (article_url, target_dir) pairs to feed into save_page_content.
+    """
+    url = build_belta_url(from_day=from_day, to_day=to_day)
+    logger.debug(f"Processing {from_day}")
+    logger.debug(f"Using URL {url}")
+
+    pages = get_pages_links(url)
+    total_links = []
+
+    date_dir = prepare_date_dir(from_day)
 
     # total_links = get_article_links(pages[0])
     for page in pages:
@@ -302,49 +442,106 @@ def download_all_from_period(from_day="01.12.2024", to_day="01.12.2024", worker_
 
     logger.debug(f"Total links found: {len(total_links)}")
 
+    return [(link, date_dir) for link in total_links]
+
+
+# --- Async crawler -------------------------------------------------------------
+# The crawl is I/O-bound against a single host, so the driver runs on one event
+# loop with a bounded number of in-flight GETs. Parsing and disk writes are
+# pushed to the default thread executor to keep the loop responsive.
+
+MAX_IN_FLIGHT = 64
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-    def fetch_article(url):
+
+async def fetch(session, semaphore, url, retries=3, backoff_factor=0.3):
+    """GET url with retry/backoff; returns the raw body, or None on failure."""
+    for attempt in range(retries + 1):
         try:
-            save_page_content(url, date_dir)
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-        time.sleep(worker_timeout)
+            async with semaphore:
+                async with session.get(url) as response:
+                    # Transient statuses fall through to the backoff below
+                    if response.status not in RETRY_STATUSES or attempt == retries:
+                        response.raise_for_status()
+                        return await response.read()
+        except aiohttp.ClientResponseError as e:
+            logger.error(f"Request failed: {url}: {e}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                logger.error(f"Request failed: {url}: {e}")
+                return None
+        await asyncio.sleep(backoff_factor * (2 ** attempt))
+
+
+async def collect_article_jobs(session, semaphore, date):
+    """Async counterpart of collect_article_jobs_sync for a single day."""
+    loop = asyncio.get_running_loop()
+    try:
+        url = build_belta_url(from_day=date, to_day=date)
+        logger.debug(f"Processing {date}")
+        logger.debug(f"Using URL {url}")
+
+        search_page = await fetch(session, semaphore, url)
+        if search_page is None:
+            return []
+        pages = await loop.run_in_executor(None, parse_pages_links, search_page)
+        date_dir = await loop.run_in_executor(None, prepare_date_dir, date)
+
+        total_links = []
+        for body in await asyncio.gather(*(fetch(session, semaphore, page) for page in pages)):
+            if body is not None:
+                total_links += await loop.run_in_executor(None, parse_article_links, body)
+
+        logger.debug(f"Total links found: {len(total_links)}")
+        return [(link, date_dir) for link in total_links]
+    except Exception as e:
+        logger.error(f"Error processing date {date}: {e}")
+        return []
 
-    # Delegate tasks to N worker threads
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        # Submit all tasks
-        future_to_url = {executor.submit(fetch_article, url): url for url in total_links}
 
+async def save_page_content_async(session, semaphore, url, folder, writer=None):
+    """Async counterpart of save_page_content."""
+    loop = asyncio.get_running_loop()
+    try:
+        body = await fetch(session, semaphore, url)
+        if body is not None:
+            await loop.run_in_executor(None, write_article, body, folder, writer)
+    except OSError as e:
+        logger.error(f"OS error saving file: {e}")
+    except Exception as e:
+        logger.error(f"Error fetching {url}: {e}")
+
+
+async def scrape_dates(dates):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}, timeout=timeout) as session:
+        # Stage 1: fan out over dates to collect (article_url, date_dir) jobs
+        article_jobs = []
+        tasks = [collect_article_jobs(session, semaphore, date) for date in dates]
+        with tqdm(total=len(tasks), desc="Collecting links", unit="date") as pbar:
+            for task in asyncio.as_completed(tasks):
+                article_jobs.extend(await task)
+                pbar.update(1)
+
+        # Stage 2: download every article; progress is counted per article
+        writer = BackgroundWriter()
+        try:
+            tasks = [save_page_content_async(session, semaphore, url, folder, writer) for url, folder in article_jobs]
+            with tqdm(total=len(tasks), desc="Downloading articles", unit="article") as pbar:
+                for task in asyncio.as_completed(tasks):
+                    await task
+                    pbar.update(1)
+        finally:
+            await loop.run_in_executor(None, writer.close)
 
-    
 
 # logger.debug(url)
 
-def process_single_date(date):
-    """Wrapper function to process a single date"""
-    download_all_from_period(
-        from_day=date,
-        to_day=date,
-        worker_count=3
-    )
-    return date
-
 start_date = "01.01.2011"
 end_date = "01.01.2012"  # Changed to process 5 days for better progress visualization
 dates = generate_date_strings(start_date, end_date)
 
-# Process dates in parallel while maintaining progress bar
-with ThreadPoolExecutor(max_workers=min(len(dates), 5)) as executor:
-    # Submit all tasks
-    futures = {executor.submit(process_single_date, date): date for date in dates}
-
-    # Create progress bar and update as tasks complete
-    with tqdm(total=len(dates), desc="Processing dates", unit="date") as pbar:
-        for future in concurrent.futures.as_completed(futures):
-            date = futures[future]
-            try:
-                result = future.result()
-                pbar.update(1)  # Update progress bar when a date is completed
-            except Exception as e:
-                logger.error(f"Error processing date {date}: {e}")
-                pbar.update(1)  # Still update progress even if there's an error
+asyncio.run(scrape_dates(dates))
@@ -1,12 +1,105 @@
+import logging
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from neo4j import GraphDatabase, basic_auth
 from dotenv import load_dotenv
 from neo4j.graph import Node, Relationship, Path
+from neo4j.time import Date, DateTime, Duration, Time
 from pydantic import BaseModel, Field
 
+# DEBUG is off by default, so per-request debug logging is a no-op
+logger = logging.getLogger(__name__)
+
+# neo4j.time values are not datetime subclasses; convert them once here so the
+# response can go straight to orjson, which serializes native datetimes in C.
+_TEMPORAL_CONVERTERS = {Date: Date.to_native, Time: Time.to_native, DateTime: DateTime.to_native, Duration: str}
+
+
+def _to_native(value, nodes_map=None, edges_map=None, reprs=None):
+    """
+    Convert neo4j.time values (also inside lists/maps) to JSON-serializable types.
+    Given the result maps, Nodes/Relationships/Paths nested in lists or maps
+    (`collect(n)`, `nodes(p)`, `{a: n}`) are packed like top-level ones.
+    """
+    convert = _TEMPORAL_CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    if nodes_map is not None:
+        packer = _packer_for(type(value))
+        if packer is not None:
+            return packer(value, nodes_map, edges_map, reprs)
+    if isinstance(value, list):
+        return [_to_native(item, nodes_map, edges_map, reprs) for item in value]
+    if isinstance(value, dict):
+        return {k: _to_native(v, nodes_map, edges_map, reprs) for k, v in value.items()}
+    return value
+
+
+# Packers record each element once: a node/relationship that repeats across
+# records is not converted again, and its table-cell string is reused from reprs.
+
+def _pack_node(node, nodes_map, edges_map, reprs):
+    element_id = node.element_id
+    if element_id in nodes_map:
+        return reprs[element_id]
+    nodes_map[element_id] = {
+        "id": element_id,
+        "labels": list(node.labels), # Convert frozenset to list
+        "properties": {k: _to_native(v) for k, v in node.items()}
+    }
+    # For the table view, we might just want a string rep
+    text = reprs[element_id] = f"Node({element_id})"
+    return text
+
+
+def _pack_relationship(rel, nodes_map, edges_map, reprs):
+    element_id = rel.element_id
+    if element_id in edges_map:
+        return reprs[element_id]
+    edges_map[element_id] = {
+        "id": element_id,
+        "source": rel.start_node.element_id,
+        "target": rel.end_node.element_id,
+        "type": rel.type,
+        "properties": {k: _to_native(v) for k, v in rel.items()}
+    }
+    text = reprs[element_id] = f"Rel({rel.type})"
+    return text
+
+
+def _pack_path(path, nodes_map, edges_map, reprs):
+    # A container of Nodes and Rels; elements seen before short-circuit in their packers
+    for node in path.nodes:
+        _pack_node(node, nodes_map, edges_map, reprs)
+    for rel in path.relationships:
+        _pack_relationship(rel, nodes_map, edges_map, reprs)
+    return f"Path(len={len(path)})"
+
+
+# Dispatch table keyed by exact type(value). Scalars map to None.
+_GRAPH_PACKERS = {Node: _pack_node, Relationship: _pack_relationship, Path: _pack_path}
+
+
+def _packer_for(value_type):
+    """
+    Look up the packer for a value type.
+    The driver builds a Relationship subclass per relationship type, so unseen
+    types are resolved once through their MRO and memoized.
+    """
+    try:
+        return _GRAPH_PACKERS[value_type]
+    except KeyError:
+        packer = next(
+            (_GRAPH_PACKERS[base] for base in value_type.__mro__ if base in (Node, Relationship, Path)),
+            None,
+        )
+        _GRAPH_PACKERS[value_type] = packer
+        return packer
+
+
 def process_neo4j_results(result):
     """
     Parses a Neo4j Result object into a generic format for the frontend.
@@ -16,6 +109,8 @@ def process_neo4j_results(result):
     # Use dictionaries for deduplication (Key = Element ID)
     nodes_map = {}
     edges_map = {}
+    # Element ID -> table-cell string, so repeated elements skip the f-string
+    reprs = {}
     
     # List to hold non-graph tabular data
     table_data = []
@@ -25,58 +120,13 @@ def process_neo4j_results(result):
         
         # Iterate over every key-value pair in the row
         for key, value in record.items():
-            
-            # --- CHECK FOR GRAPH DATA ---
-            
-            # 1. Is it a Node?
-            if isinstance(value, Node):
-                nodes_map[value.element_id] = {
-                    "id": value.element_id,
-                    "labels": list(value.labels), # Convert frozenset to list
-                    "properties": dict(value)
-                }
-                # For the table view, we might just want a string rep
-                row_data[key] = f"Node({value.element_id})"
-
-            # 2. Is it a Relationship?
-            elif isinstance(value, Relationship):
-                edges_map[value.element_id] = {
-                    "id": value.element_id,
-                    "source": value.start_node.element_id,
-                    "target": value.end_node.element_id,
-                    "type": value.type,
-                    "properties": dict(value)
-                }
-                row_data[key] = f"Rel({value.type})"
-
-            # 3. Is it a Path? (A container of Nodes and Rels)
-            elif isinstance(value, Path):
-                for node in value.nodes:
-                    nodes_map[node.element_id] = {
-                        "id": node.element_id,
-                        "labels": list(node.labels),
-                        "properties": dict(node)
-                    }
-                for rel in value.relationships:
-                    edges_map[rel.element_id] = {
-                        "id": rel.element_id,
-                        "source": rel.start_node.element_id,
-                        "target": rel.end_node.element_id,
-                        "type": rel.type,
-                        "properties": dict(rel)
-                    }
-                row_data[key] = f"Path(len={len(value)})"
-
-            # 4. Is it a List? (Might contain Nodes/Rels)
-            elif isinstance(value, list):
-                # You might want to recursively check lists here 
-                # strictly for visualization extraction
-                row_data[key] = value
-
-            # --- OTHERWISE IT IS SCALAR DATA ---
+            packer = _packer_for(type(value))
+            if packer is not None:
+                # Graph data (Node / Relationship / Path)
+                row_data[key] = packer(value, nodes_map, edges_map, reprs)
             else:
-                # Strings, Ints, Maps, Dates
-                row_data[key] = value
+                # Strings, Ints, Maps, Dates, Lists (which may hold graph data too)
+                row_data[key] = _to_native(value, nodes_map, edges_map, reprs)
         
         table_data.append(row_data)
 
@@ -103,13 +153,13 @@ async def lifespan(app: FastAPI):
     # Startup: Create driver
     global driver
     driver = GraphDatabase.driver(URI, auth=basic_auth(USER, PASSWORD))
-    print(f"Connected to Neo4j at {URI}")
+    logger.info(f"Connected to Neo4j at {URI}")
     yield
     # Shutdown: Close driver
     if driver:
         driver.close()
 
-app = FastAPI(lifespan=lifespan, debug=True)
+app = FastAPI(lifespan=lifespan, debug=True, default_response_class=ORJSONResponse)
 
 # 3. CORS Setup (Crucial for Sigma.js on localhost:3000 to talk to Python on localhost:8000)
 app.add_middleware(
@@ -122,66 +172,62 @@ app.add_middleware(
 
 # 4. The Optimized Cypher Query
 # We explicitly map your specific fields (reasoning, date, source_files) here.
+# The query only projects flat columns per relationship; node de-duplication
+# happens in get_graph_data_tx with a dict keyed by elementId, which is linear,
+# instead of collect(DISTINCT ...) + UNWIND aggregation on the server.
+# It is a constant string so Neo4j reuses the cached plan across requests.
 CYPHER_QUERY = """
     MATCH (n)-[r]->(m)
+    RETURN
+        // Source & Target Nodes
+        // We use "name" for the visual label because your insertion code uses "name" as the key.
+        elementId(n) AS source, n.name AS source_name, head(labels(n)) AS source_label,
+        elementId(m) AS target, m.name AS target_name, head(labels(m)) AS target_label,
+
+        // Edge (Relationship) with your custom data
+        elementId(r) AS key,
+        type(r) AS label,              // e.g. "HELD_POSITION"
+        r.date AS date,                // e.g. "2004-02-15"
+        r.reasoning AS reasoning,      // The explanation text
+        r.context AS context,          // The context (e.g., "Winter Gas Dispute")
+        r.source_files[0] AS src,
+        toString(r.created_at) AS created_at  // Debugging info
     // Optional: Limit for performance if DB is huge
     LIMIT 100
-
-    WITH n, r, m
-    
-    // 1. Pack Source & Target Nodes
-    // We use "name" for the visual label because your insertion code uses "name" as the key.
-    WITH collect(DISTINCT {
-        key: elementId(n), 
-        attributes: {
-            // Visual Label: "Mikhail Kasyanov"
-            name: n.name,
-            
-            // Category: "Person", "Organization" (Derived from your Entity.label)
-            label: head(labels(n)) 
-        }
-    }) + collect(DISTINCT {
-        key: elementId(m), 
-        attributes: {
-            name: m.name,
-            label: head(labels(m))
-        }
-    }) as rawNodes, 
-    
-    // 2. Pack Edges (Relationships)
-    // Mapping your specific Relationship fields here
-    collect({
-        key: elementId(r),
-        source: elementId(n),
-        target: elementId(m),
-        attributes: {
-            
-            // --- YOUR CUSTOM DATA ---
-            label: type(r),          // e.g. "HELD_POSITION"
-            date: r.date,            // e.g. "2004-02-15"
-            reasoning: r.reasoning,  // The explanation text
-            context: r.context,      // The context (e.g., "Winter Gas Dispute")
-            src: r.source_files[0],
-            // Visual Logic: Thicker line if multiple source files exist
-            // source_count: size(r.source_files),
-            
-            // Debugging info
-            created_at: toString(r.created_at)
-        }
-    }) as edges
-
-    // 3. Deduplicate Nodes (Because a node can be both a source and a target)
-    UNWIND rawNodes as node
-    WITH collect(DISTINCT node) as nodes, edges
-    
-    // 4. Return Single JSON Object
-    RETURN { nodes: nodes, edges: edges } as graphData
 """
 
 def get_graph_data_tx(tx):
-    result = tx.run(CYPHER_QUERY)
-    record = result.single()
-    return record["graphData"] if record else {"nodes": [], "edges": []}
+    nodes = {}
+    edges = []
+    for record in tx.run(CYPHER_QUERY):
+        # A node can be both a source and a target; keep the first occurrence
+        for side in ("source", "target"):
+            key = record[side]
+            if key not in nodes:
+                nodes[key] = {
+                    "key": key,
+                    "attributes": {
+                        "name": record[f"{side}_name"],
+                        "label": record[f"{side}_label"],
+                    },
+                }
+        edges.append({
+            "key": record["key"],
+            "source": record["source"],
+            "target": record["target"],
+            "attributes": {
+                "label": record["label"],
+                "date": _to_native(record["date"]),
+                "reasoning": record["reasoning"],
+                "context": record["context"],
+                "src": record["src"],
+                "created_at": record["created_at"],
+            },
+        })
+    return {"nodes": list(nodes.values()), "edges": edges}
+
+
+RESULT_FETCH_SIZE = 1000
 
 
 class Query(BaseModel):
@@ -189,20 +235,23 @@ class Query(BaseModel):
 
 @app.post("/api/query")
 def exec_query_and_parse(query: Query):
-    print(f"Executing {query.query}")
+    # Queries can be multi-KB; only format them when DEBUG is actually on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Executing {query.query}")
     if not driver:
         raise HTTPException(status_code=503, detail="Database connection failed")
     
     try:
         # Execute query in a read transaction (Best Practice for Clusters/Performance)
-        with driver.session() as session:
+        # Larger fetch_size pulls records in fewer Bolt round-trips
+        with driver.session(fetch_size=RESULT_FETCH_SIZE) as session:
             result = session.run(query.query) # type: ignore
             data = process_neo4j_results(result)
-            print(data)
-            return data
+            # Returning the response directly skips jsonable_encoder's Python walk
+            return ORJSONResponse(data)
         
     except Exception as e:
-        print(f"Error executing query: {e}")
+        logger.error(f"Error executing query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -229,6 +278,17 @@ def exec_query_and_parse(query: Query):
 #     }
 #   ]
 # }
+#
+# A list-of-nodes column (e.g. `RETURN collect(w) AS ws`) is packed element by element:
+# every node also goes into "graph.nodes", and the cell holds their table strings
+#   "table": [
+#     {
+#       "ws": [
+#         "Node(4:b2708301-8eb4-46c4-b223-94e1558f39c5:280)",
+#         "Node(4:b2708301-8eb4-46c4-b223-94e1558f39c5:281)"
+#       ]
+#     }
+#   ]
 
 
 
@@ -247,10 +307,11 @@ async def get_graph():
         # Execute query in a read transaction (Best Practice for Clusters/Performance)
         with driver.session() as session:
             data = session.execute_read(get_graph_data_tx)
-            print(f"Loaded nodes : {len(data["nodes"])}")
-            return data
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Loaded nodes : {len(data['nodes'])}")
+            return ORJSONResponse(data)
     except Exception as e:
-        print(f"Error executing query: {e}")
+        logger.error(f"Error executing query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
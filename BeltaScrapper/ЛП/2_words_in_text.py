@@ -1,34 +1,80 @@
 import os
 import re
 import sys
-import chardet
+import codecs
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from logger_config import get_logger
 
 logger = get_logger(__name__)
 
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+WORD1 = "Лукашенко"
+WORD2 = "Путин"
+
+
+@lru_cache(maxsize=None)
+def words_pattern(words):
+    """Compile (once per word tuple) a single case-insensitive whole-word alternation."""
+    alternation = '|'.join(re.escape(word) for word in words)
+    return re.compile(rf'\b(?:{alternation})\b', re.IGNORECASE)
+
+def guess_encoding(head):
+    """
+    Cheap UTF-8 vs CP1251 guess from the first bytes of a file.
+    The corpus is Russian text, so anything that is not valid UTF-8 is treated as CP1251.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # Incremental decode tolerates a multi-byte sequence cut at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1251'
+
 def contains_both_words(filepath, word1, word2):
     """
     Check if the file content contains both word1 and word2 as whole words.
-    Tries to handle encoding automatically.
+    The file is scanned in CHUNK_SIZE blocks (with a small overlap so matches
+    spanning a block boundary are not lost) and scanning stops as soon as both
+    words have been seen.
     """
     try:
-        # Detect encoding
-        with open(filepath, 'rb') as f:
-            raw_data = f.read(8192)  # Read first 8KB for detection
-        encoding = chardet.detect(raw_data)['encoding']
-        if encoding is None:
-            encoding = 'utf-8'
+        pattern = words_pattern((word1, word2))
+        wanted = {word1.lower(), word2.lower()}
+        found = set()
+        # One extra char so the char preceding a carried-over word keeps its \b context
+        overlap = max(len(word1), len(word2)) + 1
 
-        # Read full file with detected encoding
-        with open(filepath, 'r', encoding=encoding, errors='ignore') as f:
-            content = f.read()
+        decoder = None
+        tail = ''
+        tail_at_file_start = True
+        with open(filepath, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                final = not chunk
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(guess_encoding(chunk[:8192]))(errors='ignore')
+                window = tail + decoder.decode(chunk, final=final)
 
-        # Search for whole-word matches using regex word boundaries
-        pattern1 = re.compile(rf'\b{re.escape(word1)}\b', re.IGNORECASE)
-        pattern2 = re.compile(rf'\b{re.escape(word2)}\b', re.IGNORECASE)
+                for match in pattern.finditer(window):
+                    # Already checked (with its real left context) in the previous window
+                    if match.start() == 0 and not tail_at_file_start:
+                        continue
+                    # Word may continue in the next chunk; it is re-checked there
+                    if not final and match.end() == len(window):
+                        continue
+                    found.add(match.group(0).lower())
+                    if found >= wanted:
+                        return True
 
-        return bool(pattern1.search(content) and pattern2.search(content))
+                if final:
+                    return False
+                tail_at_file_start = tail_at_file_start and len(window) <= overlap
+                tail = window[-overlap:]
 
     except Exception:
         # Skip unreadable files
@@ -36,13 +82,18 @@ def contains_both_words(filepath, word1, word2):
 
 def main():
     root_folder = sys.argv[1] if len(sys.argv) > 1 else "."
-    word1 = "Лукашенко"
-    word2 = "Путин"
 
-    for dirpath, _, filenames in os.walk(root_folder):
-        for filename in filenames:
-            filepath = os.path.join(dirpath, filename)
-            if contains_both_words(filepath, word1, word2):
+    filepaths = [
+        os.path.join(dirpath, filename)
+        for dirpath, _, filenames in os.walk(root_folder)
+        for filename in filenames
+    ]
+
+    # Scanning is CPU-bound (decoding + regex), so fan files out across cores
+    contains_both_words_const = partial(contains_both_words, word1=WORD1, word2=WORD2)
+    with ProcessPoolExecutor() as executor:
+        for filepath, hit in zip(filepaths, executor.map(contains_both_words_const, filepaths, chunksize=64)):
+            if hit:
                 logger.info(os.path.abspath(filepath))
 
 if __name__ == "__main__":
@@ -1,10 +1,14 @@
 import sqlite3
 import os
-from difflib import SequenceMatcher
 import logging
-from typing import Optional, Set
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from rapidfuzz import fuzz, process
 from schemas import KnowledgeGraph
 
+# Default SQLITE_MAX_VARIABLE_NUMBER for SQLite builds older than 3.32
+SQLITE_MAX_VARIABLES = 999
+
 
 class EntityNameNormalizer:
     """Handles entity name normalization, fuzzy matching, and storage in SQLite."""
@@ -12,15 +16,60 @@ class EntityNameNormalizer:
     def __init__(self, sqlite_db_path: str = "entities.db"):
         self.sqlite_db_path = sqlite_db_path
         self.logger = logging.getLogger("EntityNameNormalizer")
-        self.entity_cache: Set[str] = set()
-        self.init_sqlite_db()
+        # Cache is kept as parallel arrays: names (contiguous list RapidFuzz can scan in one call)
+        # and their precomputed token sets, plus a set for exact-match lookups
+        self.entity_cache_set: Set[str] = set()
+        self.entity_cache_names: List[str] = []
+        self.entity_cache_tokens: List[FrozenSet[str]] = []
+        # Inverted index: token -> positions in entity_cache_names of the names containing it
+        self.entity_token_index: Dict[str, List[int]] = {}
+        # Cached names bucketed by length, to skip names whose length alone rules out a fuzzy match
+        self.entity_cache_by_len: Dict[int, List[str]] = {}
+        # One connection per process (see `conn`), kept open so sqlite3's statement cache is reused
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._process_lock = threading.RLock()
         self.load_cache()
 
+    @property
+    def _lock(self) -> threading.RLock:
+        """Guards the connection and the cache, which are shared between worker threads."""
+        if self._conn_pid != os.getpid():
+            # Forked child: the parent's lock may have been held by a thread that doesn't exist here
+            self._process_lock = threading.RLock()
+            self._conn = None
+            self._conn_pid = os.getpid()
+        return self._process_lock
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened lazily and per process: a SQLite connection must not be used across fork(),
+        # and pool workers are forked after the normalizer is created at import time
+        with self._lock:
+            if self._conn is None:
+                # isolation_level=None: autocommit for single statements, explicit BEGIN/COMMIT for batches
+                self._conn = sqlite3.connect(self.sqlite_db_path, check_same_thread=False, isolation_level=None)
+                self.init_sqlite_db()
+            return self._conn
+
     def init_sqlite_db(self):
         """Initialize the SQLite database and create the entities table if it doesn't exist."""
-        conn = sqlite3.connect(self.sqlite_db_path)
-        cursor = conn.cursor()
-        
+        # Called on every new connection: besides the table, it sets the per-connection PRAGMAs
+        cursor = self.conn.cursor()
+
+        # page_size only takes effect on an empty database, before any table exists and before WAL is on
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entities'")
+        if cursor.fetchone() is None:
+            cursor.execute("PRAGMA page_size=8192")
+
+        # WAL + synchronous=NORMAL: one fsync per checkpoint instead of per commit, readers don't block writers.
+        # An OS crash may lose the last committed batch; acceptable here since the entity cache can be rebuilt.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+
         # Create table to store only normalized entity names for matching
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS entities (
@@ -30,33 +79,72 @@ class EntityNameNormalizer:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
-        
-        conn.commit()
-        conn.close()
 
     def load_cache(self):
         """Load all normalized entity names into memory."""
-        conn = sqlite3.connect(self.sqlite_db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM entities")
-        rows = cursor.fetchall()
-        self.entity_cache = {row[0] for row in rows}
-        conn.close()
-        self.logger.info(f"Loaded {len(self.entity_cache)} entities into cache.")
+        with self._lock:
+            rows = self.conn.execute("SELECT name FROM entities").fetchall()
+            self.entity_cache_set = set()
+            self.entity_cache_names = []
+            self.entity_cache_tokens = []
+            self.entity_token_index = {}
+            self.entity_cache_by_len = {}
+            for row in rows:
+                self._cache_name(row[0])
+        self.logger.info(f"Loaded {len(self.entity_cache_set)} entities into cache.")
+
+    def _cache_name(self, normalized_name: str):
+        """Add a normalized name to every in-memory cache structure."""
+        if normalized_name in self.entity_cache_set:
+            return
+        self.entity_cache_set.add(normalized_name)
+        position = len(self.entity_cache_names)
+        tokens = frozenset(normalized_name.split())
+        self.entity_cache_names.append(normalized_name)
+        self.entity_cache_tokens.append(tokens)
+        for token in tokens:
+            self.entity_token_index.setdefault(token, []).append(position)
+        self.entity_cache_by_len.setdefault(len(normalized_name), []).append(normalized_name)
+
+    def _length_candidates(self, normalized_name: str, threshold: float) -> List[str]:
+        """
+        Cached names whose length still allows ratio >= threshold.
+        ratio = 2*M/(len1+len2) <= 2*min/(min+max), so min/max must be >= threshold/(2-threshold).
+        """
+        length = len(normalized_name)
+        if threshold <= 0:
+            return self.entity_cache_names
+        bound = threshold / (2 - threshold)
+        low = int(length * bound)
+        high = int(length / bound) + 1
+        candidates = []
+        for candidate_len in range(low, high + 1):
+            bucket = self.entity_cache_by_len.get(candidate_len)
+            if bucket:
+                candidates.extend(bucket)
+        return candidates
+
+    def known_names_count(self) -> int:
+        """Number of (normalized) entity names currently in the cache."""
+        return len(self.entity_cache_names)
+
+    def names_since(self, offset: int) -> List[str]:
+        """
+        The cached names after the first `offset`. Names are only ever appended (until the cache
+        is cleared), so a caller that remembers how many it has seen gets just the new ones.
+        """
+        with self._lock:
+            return self.entity_cache_names[offset:]
 
     def normalize_name(self, name: str) -> str:
         """Convert entity name to lowercase for consistent comparison."""
         return name.lower().strip()
 
-    def _is_subset_match(self, name1: str, name2: str) -> bool:
+    def _is_subset_match(self, name1: str, tokens1: FrozenSet[str], name2: str, tokens2: FrozenSet[str]) -> bool:
         """
-        Check if one name is a significant subset of the other.
+        Check if one name is a significant subset of the other, using precomputed token sets.
         Example: 'lukashenko' in 'alexander lukashenko' -> True
         """
-        # Split into tokens
-        tokens1 = set(name1.split())
-        tokens2 = set(name2.split())
-        
         # If one token set is a subset of the other
         if tokens1.issubset(tokens2) or tokens2.issubset(tokens1):
             # Length check to avoid matching "the" to "the beatles" if "the" was an entity
@@ -67,71 +155,155 @@ class EntityNameNormalizer:
 
     def get_similar_entity(self, name: str, threshold: float = 0.8) -> str:
         """Use fuzzy matching to find similar entity names using in-memory cache."""
-        normalized_name = self.normalize_name(name)
-        
+        return self.get_similar_entity_precomputed(self.normalize_name(name), threshold)
+
+    def get_similar_entity_precomputed(self, normalized_name: str, threshold: float = 0.8) -> str:
+        """Same as get_similar_entity, for a name that already went through normalize_name."""
         # 1. Exact match check (fast)
-        if normalized_name in self.entity_cache:
+        if normalized_name in self.entity_cache_set:
             return normalized_name
         
-        best_match = None
-        best_ratio = 0
-        
-        for stored_name in self.entity_cache:
-            # 2. Token Subset Match (Strong Signal)
-            # If "Putina" matches "Vladimira Putina", we want to merge.
-            # But be careful: "Ministry of Health" vs "Ministry of Education" share tokens but are different.
-            # So strict subset is safer: {Lukashenko} is subset of {Alexander, Lukashenko}
-            
-            is_subset = self._is_subset_match(normalized_name, stored_name)
-            
-            if is_subset:
-                 # If it's a subset, we treat it as a very high match, but maybe not 100% automatic?
-                 # Actually for typical news names (surname vs full name), this is desired.
-                 # We prioritize the LONGER name usually as the canonical one, but here we return the STORED one.
-                 # If we have "lukashenko" stored and input is "alexander lukashenko",
-                 # stored is subset of input. We return stored ("lukashenko") -> mapping "alexander..." to "lukashenko".
-                 # Ideally we want the longest one to be the key, but that requires DB migration.
-                 # For now, let's just say they match.
-                 return stored_name
-
-            # 3. Standard SequenceMatcher (Fuzzy)
-            ratio = SequenceMatcher(None, normalized_name, stored_name).ratio()
-            if ratio > best_ratio and ratio >= threshold:
-                best_ratio = ratio
-                best_match = stored_name
-        
-        return best_match # type: ignore
+        # 2. Token Subset Match (Strong Signal)
+        # If "Putina" matches "Vladimira Putina", we want to merge.
+        # But be careful: "Ministry of Health" vs "Ministry of Education" share tokens but are different.
+        # So strict subset is safer: {Lukashenko} is subset of {Alexander, Lukashenko}
+        subset_match = self._find_subset_match(normalized_name)
+        if subset_match:
+            return subset_match
 
-    def add_entity_to_db(self, name: str, description: Optional[str] = None):
-        """Add a normalized (lowercase) entity name to the SQLite database."""
-        # Note: description is now ignored as it should be stored in a separate glossary
-        normalized_name = self.normalize_name(name)
+        # 3. Fuzzy ratio (same score as SequenceMatcher.ratio, but computed in C++)
+        match = process.extractOne(
+            normalized_name,
+            self._length_candidates(normalized_name, threshold),
+            scorer=fuzz.ratio,
+            score_cutoff=threshold * 100,
+        )
+        return match[0] if match else None # type: ignore
 
-        conn = sqlite3.connect(self.sqlite_db_path)
-        cursor = conn.cursor()
+    def _find_subset_match(self, normalized_name: str) -> Optional[str]:
+        """Return the first cached name whose tokens are a subset (or superset) of the input."""
+        tokens = frozenset(normalized_name.split())
 
-        try:
-            # Use INSERT OR IGNORE to handle duplicates - only store name now
-            if description:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO entities (name, description) VALUES (?, ?)",
-                    (normalized_name, description)
-                )
-            else:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO entities (name) VALUES (?)",
-                    (normalized_name,)
-                )
+        # Either direction of subset requires at least one shared token, so only names
+        # found through the token index can match. Sorted to keep cache order (first match wins).
+        candidates = set()
+        for token in tokens:
+            candidates.update(self.entity_token_index.get(token, ()))
 
-            conn.commit()
+        for position in sorted(candidates):
+            stored_name = self.entity_cache_names[position]
+            stored_tokens = self.entity_cache_tokens[position]
+            if self._is_subset_match(normalized_name, tokens, stored_name, stored_tokens):
+                # For typical news names (surname vs full name), this is desired.
+                # If we have "lukashenko" stored and input is "alexander lukashenko",
+                # stored is subset of input. We return stored ("lukashenko") -> mapping "alexander..." to "lukashenko".
+                # Ideally we want the longest one to be the key, but that requires DB migration.
+                return stored_name
+        return None
 
-            # Add to cache if it's not already there
-            if normalized_name not in self.entity_cache:
-                self.entity_cache.add(normalized_name)
+    def add_entity_to_db(self, name: str, description: Optional[str] = None, cursor: Optional[sqlite3.Cursor] = None):
+        """
+        Add a normalized (lowercase) entity name to the SQLite database.
+        If a cursor is given, the insert joins the caller's transaction and is not committed here.
+        """
+        normalized_name = self.normalize_name(name)
+
+        if cursor is not None:
+            self._add_entity_nocommit(cursor, normalized_name, description)
+            return
+
+        try:
+            with self._lock:
+                self._add_entity_nocommit(self.conn.cursor(), normalized_name, description)
         except Exception as e:
             self.logger.error(f"Error adding entity to DB: {e}")
-        finally:
-            conn.close()
+
+    def _add_entity_nocommit(self, cursor: sqlite3.Cursor, normalized_name: str, description: Optional[str] = None):
+        """INSERT OR IGNORE an already normalized entity name on the given cursor and update the in-memory cache."""
+        # Use INSERT OR IGNORE to handle duplicates
+        if description:
+            cursor.execute(
+                "INSERT OR IGNORE INTO entities (name, description) VALUES (?, ?)",
+                (normalized_name, description)
+            )
+        else:
+            cursor.execute(
+                "INSERT OR IGNORE INTO entities (name) VALUES (?)",
+                (normalized_name,)
+            )
+
+        # Add to cache if it's not already there
+        self._cache_name(normalized_name)
+
+    def add_entities_bulk(self, pairs: List[Tuple[str, Optional[str]]]):
+        """Add many (name, description) pairs inside a single transaction."""
+        if not pairs:
+            return
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            rows = [(self.normalize_name(name), description or None) for name, description in pairs]
+            # Multi-row VALUES: one statement execution per chunk instead of per row
+            rows_per_statement = SQLITE_MAX_VARIABLES // 2
+            try:
+                cursor.execute("BEGIN")
+                for start in range(0, len(rows), rows_per_statement):
+                    chunk = rows[start:start + rows_per_statement]
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO entities (name, description) VALUES " + ",".join(["(?, ?)"] * len(chunk)),
+                        [value for row in chunk for value in row]
+                    )
+                cursor.execute("COMMIT")
+                for normalized_name, _ in rows:
+                    self._cache_name(normalized_name)
+            except Exception as e:
+                self.conn.rollback()
+                self.logger.error(f"Error adding entities to DB: {e}")
+
+    def bulk_load_entities(self, entities: Iterable[Tuple[str, Optional[str]]]):
+        """
+        Initial load of (name, description) pairs.
+        On an empty table the UNIQUE index is built once after all rows are in, which is much
+        cheaper than maintaining it row by row. A non-empty table goes through add_entities_bulk.
+        """
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM entities LIMIT 1").fetchone() is not None:
+                self.add_entities_bulk(list(entities))
+                return
+
+            # Without the UNIQUE constraint duplicates must be dropped here; keep the first description seen
+            rows: Dict[str, Optional[str]] = {}
+            for name, description in entities:
+                normalized_name = self.normalize_name(name)
+                if not rows.get(normalized_name):
+                    rows[normalized_name] = description or None
+            if not rows:
+                return
+
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute("BEGIN")
+                cursor.execute("DROP TABLE entities")
+                cursor.execute('''
+                    CREATE TABLE entities (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL,
+                        description TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.executemany("INSERT INTO entities (name, description) VALUES (?, ?)", rows.items())
+                cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_entities_name ON entities(name)")
+                cursor.execute("COMMIT")
+            except Exception as e:
+                self.conn.rollback()
+                self.logger.error(f"Error bulk loading entities: {e}")
+                return
+
+            for normalized_name in rows:
+                self._cache_name(normalized_name)
+
+        self.logger.info(f"Bulk loaded {len(rows)} entities.")
 
     def get_relevant_context(self, names: list[str], threshold: float = 0.8) -> list[dict]:
         """
@@ -145,51 +317,69 @@ class EntityNameNormalizer:
         results = []
         normalized_inputs = {name: self.normalize_name(name) for name in names}
 
+        # Resolve exact and subset matches first; the rest are scored in one batch
+        matches = {}
+        fuzzy_inputs = []
         for input_name, norm_input in normalized_inputs.items():
-            best_match = self.get_similar_entity(input_name, threshold)
+            if norm_input in self.entity_cache_set:
+                matches[input_name] = norm_input
+                continue
+            subset_match = self._find_subset_match(norm_input)
+            if subset_match:
+                matches[input_name] = subset_match
+            else:
+                fuzzy_inputs.append(input_name)
 
-            if best_match:
-                # Retrieve description for the matched entity from DB
-                conn = sqlite3.connect(self.sqlite_db_path)
-                cursor = conn.cursor()
-                cursor.execute("SELECT description FROM entities WHERE name = ?", (best_match,))
-                row = cursor.fetchone()
-                description = row[0] if row and row[0] else None
-                conn.close()
+        if fuzzy_inputs and self.entity_cache_names:
+            # One N x M score matrix, computed in parallel by RapidFuzz
+            scores = process.cdist(
+                [normalized_inputs[name] for name in fuzzy_inputs],
+                self.entity_cache_names,
+                scorer=fuzz.ratio,
+                score_cutoff=threshold * 100,
+                workers=-1,
+            )
+            for input_name, row in zip(fuzzy_inputs, scores):
+                best = int(row.argmax())
+                if row[best] > 0:
+                    matches[input_name] = self.entity_cache_names[best]
+
+        # Retrieve descriptions for all matched entities in one query (uses the UNIQUE index on name)
+        descriptions = self._get_descriptions(set(matches.values()))
 
+        for input_name in normalized_inputs:
+            best_match = matches.get(input_name)
+
+            if best_match:
                 results.append({
                     "original_name": input_name,
                     "matched_name": best_match,
-                    "description": description
+                    "description": descriptions.get(best_match) or None
                 })
 
         return results
 
+    def _get_descriptions(self, names: Set[str]) -> Dict[str, Optional[str]]:
+        """Fetch descriptions for the given names with WHERE name IN (...) queries."""
+        descriptions = {}
+        names = list(names)
+        with self._lock:
+            cursor = self.conn.cursor()
+            # Stay under SQLite's default limit of 999 bound variables per statement
+            for start in range(0, len(names), SQLITE_MAX_VARIABLES):
+                chunk = names[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT name, description FROM entities WHERE name IN ({placeholders})", chunk)
+                descriptions.update(cursor.fetchall())
+        return descriptions
+
     def normalize_entity_names(self, graph_data) -> KnowledgeGraph:
         """Normalize entity names (to lowercase) and use fuzzy matching to merge similar entities."""
         name_mapping = {}
 
-        # Process all entities in the graph data
-        for entity in graph_data.entities:
-            # Check if there's a similar name already in the database
-            similar_name = self.get_similar_entity(entity.name)
-
-            if similar_name:
-                name_mapping[entity.name] = similar_name
-                self.logger.info(f"Merged entity '{entity.name}' with existing entity '{similar_name}'")
-                # Add description if it exists and is not already in DB
-                if entity.description:
-                    self.add_entity_description(similar_name, entity.description)
-            else:
-                normalized_name = self.normalize_name(entity.name)
-                # Add entity with its description to the database
-                self.add_entity_to_db(entity.name, entity.description)
-                name_mapping[entity.name] = normalized_name
-
-        # Update entity names based on the mapping
-        for entity in graph_data.entities:
-            if entity.name in name_mapping:
-                entity.name = name_mapping[entity.name]
+        # All inserts/updates for one graph share a single transaction (one fsync instead of one per entity)
+        with self._lock:
+            self._normalize_entities_in_transaction(graph_data.entities, name_mapping)
 
         # Update relationship source and target names based on the mapping
         for rel in graph_data.relationships:
@@ -200,41 +390,89 @@ class EntityNameNormalizer:
 
         return graph_data
 
-    def add_entity_description(self, name: str, description: str):
+    def _normalize_entities_in_transaction(self, entities, name_mapping: dict):
+        """Match or insert each entity inside one transaction, renaming it in place and filling name_mapping."""
+        cursor = self.conn.cursor()
+
+        try:
+            cursor.execute("BEGIN")
+
+            # Normalize each distinct name once for the whole pass
+            normalized = {entity.name: self.normalize_name(entity.name) for entity in entities}
+
+            # Process all entities in the graph data
+            for entity in entities:
+                normalized_name = normalized[entity.name]
+                # Check if there's a similar name already in the database
+                similar_name = self.get_similar_entity_precomputed(normalized_name)
+
+                if similar_name:
+                    name_mapping[entity.name] = similar_name
+                    self.logger.info(f"Merged entity '{entity.name}' with existing entity '{similar_name}'")
+                    entity.name = similar_name
+                    # Add description if it exists and is not already in DB
+                    if entity.description:
+                        self._add_description_nocommit(cursor, similar_name, entity.description)
+                else:
+                    # Add entity with its description to the database
+                    self._add_entity_nocommit(cursor, normalized_name, entity.description)
+                    name_mapping[entity.name] = normalized_name
+                    entity.name = normalized_name
+
+            cursor.execute("COMMIT")
+        except Exception as e:
+            self.conn.rollback()
+            self.load_cache()
+            self.logger.error(f"Error storing normalized entities: {e}")
+
+    def add_entity_description(self, name: str, description: str, cursor: Optional[sqlite3.Cursor] = None):
         """
         Add description to an entity in the database only if it doesn't have one already.
+        If a cursor is given, the update joins the caller's transaction and is not committed here.
         """
-        conn = sqlite3.connect(self.sqlite_db_path)
-        cursor = conn.cursor()
+        normalized_name = self.normalize_name(name)
+
+        if cursor is not None:
+            self._add_description_nocommit(cursor, normalized_name, description)
+            return
 
         try:
-            # Check if the entity already has a description
-            cursor.execute("SELECT description FROM entities WHERE name = ?", (self.normalize_name(name),))
-            row = cursor.fetchone()
-
-            if row is None or row[0] is None:
-                # Only update if the description is currently NULL or doesn't exist
-                cursor.execute(
-                    "UPDATE entities SET description = ? WHERE name = ? AND (description IS NULL OR description = '')",
-                    (description, self.normalize_name(name))
-                )
-                conn.commit()
-                self.logger.info(f"Added description for entity '{name}'")
-            else:
-                self.logger.info(f"Entity '{name}' already has a description, skipping update")
+            with self._lock:
+                self._add_description_nocommit(self.conn.cursor(), normalized_name, description)
         except Exception as e:
             self.logger.error(f"Error adding description to entity: {e}")
-        finally:
-            conn.close()
+
+    def _add_description_nocommit(self, cursor: sqlite3.Cursor, normalized_name: str, description: str):
+        """Set the description of an already normalized name on the given cursor if it doesn't have one yet."""
+        # Single-statement UPSERT: the NULL/empty check runs inside SQLite on the name index
+        cursor.execute(
+            "INSERT INTO entities (name, description) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET description = excluded.description "
+            "WHERE entities.description IS NULL OR entities.description = ''",
+            (normalized_name, description)
+        )
+        self._cache_name(normalized_name)
+
+        if cursor.rowcount:
+            self.logger.info(f"Added description for entity '{normalized_name}'")
+        else:
+            self.logger.info(f"Entity '{normalized_name}' already has a description, skipping update")
 
     def clear_entities_db(self):
         """Clear all entities from the SQLite database."""
-        conn = sqlite3.connect(self.sqlite_db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            self.conn.execute("DELETE FROM entities")
+            self.entity_cache_set.clear()
+            self.entity_cache_names.clear()
+            self.entity_cache_tokens.clear()
+            self.entity_token_index.clear()
+            self.entity_cache_by_len.clear()
 
-        cursor.execute("DELETE FROM entities")
-        conn.commit()
-        conn.close()
-        self.entity_cache.clear()
+        self.logger.info("Cleared all entities from the database")
 
-        self.logger.info("Cleared all entities from the database")
\ No newline at end of file
+    def close(self):
+        """Close this process's SQLite connection, if it was opened."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
\ No newline at end of file
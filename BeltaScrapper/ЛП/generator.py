@@ -1,10 +1,11 @@
+import asyncio
 import json
 import time
 import re
 import logging
 from typing import Type, TypeVar, Optional, Any, List, Dict
 from functools import wraps
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ValidationError, create_model
 
 # ---------------------------------------------------------
 # NEW IMPORT
@@ -23,6 +24,16 @@ logger = get_logger(__name__)
 T = TypeVar("T", bound=BaseModel)
 
 def measure_time(func):
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = await func(*args, **kwargs)
+            end = time.perf_counter()
+            logger.info(f"{func.__name__} took {end - start:.6f} seconds")
+            return result
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         start = time.perf_counter()
@@ -32,6 +43,13 @@ def measure_time(func):
         return result
     return wrapper
 
+class MessagePayload:
+    """Minimal message history accepted by the clients' `payload` argument."""
+    def __init__(self):
+        self.messages = []
+    def add(self, role, content):
+        self.messages.append(type('obj', (object,), {'role': role, 'content': content}))
+
 class Generator:
     """
     A class to generate instances of Pydantic models by instructing an LLM.
@@ -88,11 +106,82 @@ class Generator:
         language: Optional[str] = None,
         retries: int = RETRIES_COUNT,
         system_prompt_override: str = "",
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        max_tokens: int = 2048
     ) -> T:
         """
         Generates a Pydantic instance. Includes Self-Correction logic.
         """
+        system_prompt, history = self._start_history(pydantic_model, prompt, language, system_prompt_override)
+
+        for i in range(retries):
+            logger.info(f"Attempt {i + 1}/{retries} for {pydantic_model.__name__}")
+            
+            try:
+                # Call the API
+                response_text = self.client.complete(
+                    system_prompt=system_prompt,
+                    payload=history,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}")
+                time.sleep(1)
+                continue
+
+            instance = self._validate_or_reflect(pydantic_model, response_text, history)
+            if instance is not None:
+                return instance
+
+        raise Exception(f"Failed to generate valid {pydantic_model.__name__} after {retries} attempts.")
+
+    @measure_time
+    async def generate_one_shot_async(
+        self,
+        pydantic_model: Type[T],
+        prompt: Optional[str] = None,
+        language: Optional[str] = None,
+        retries: int = RETRIES_COUNT,
+        system_prompt_override: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> T:
+        """
+        Async variant of generate_one_shot; requires a client with an `acomplete` coroutine.
+        """
+        system_prompt, history = self._start_history(pydantic_model, prompt, language, system_prompt_override)
+
+        for i in range(retries):
+            logger.info(f"Attempt {i + 1}/{retries} for {pydantic_model.__name__}")
+
+            try:
+                # Call the API
+                response_text = await self.client.acomplete(
+                    system_prompt=system_prompt,
+                    payload=history,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            instance = self._validate_or_reflect(pydantic_model, response_text, history)
+            if instance is not None:
+                return instance
+
+        raise Exception(f"Failed to generate valid {pydantic_model.__name__} after {retries} attempts.")
+
+    def _start_history(
+        self,
+        pydantic_model: Type[T],
+        prompt: Optional[str],
+        language: Optional[str],
+        system_prompt_override: str,
+    ):
+        """Build the system prompt and the initial message history for a generation."""
         schema_json = json.dumps(pydantic_model.model_json_schema(), indent=2)
         
         system_prompt = (
@@ -115,55 +204,148 @@ Instructions:
 2. {lang_instruction}
 3. Strict Adherence to the Schema is required.
 """
-        
-        class MessagePayload:
-            def __init__(self):
-                self.messages = []
-            def add(self, role, content):
-                self.messages.append(type('obj', (object,), {'role': role, 'content': content}))
 
         history = MessagePayload()
         history.add("user", initial_user_prompt)
+        return system_prompt, history
 
-        for i in range(retries):
-            logger.info(f"Attempt {i + 1}/{retries} for {pydantic_model.__name__}")
+    def _validate_or_reflect(self, pydantic_model: Type[T], response_text: str, history: "MessagePayload") -> Optional[T]:
+        """
+        Parse and validate one LLM response. On failure, append the response and a correction
+        request to the history (Reflexion) and return None.
+        """
+        try:
+            # ---------------------------------------------------
+            # CHANGED: Use the robust repair method
+            # ---------------------------------------------------
+            parsed_data = self._parse_and_repair_json(response_text)
             
-            try:
-                # Call the API
-                response_text = self.client.complete(
-                    system_prompt=system_prompt,
-                    payload=history,
-                    temperature=temperature,
-                    max_tokens=2048
-                )
+            # Validation against Pydantic
+            return pydantic_model(**parsed_data)
 
-                # ---------------------------------------------------
-                # CHANGED: Use the robust repair method
-                # ---------------------------------------------------
-                parsed_data = self._parse_and_repair_json(response_text)
-                
-                # Validation against Pydantic
-                instance = pydantic_model(**parsed_data)
-                return instance
+        except ValidationError as e:
+            error_msg = f"Schema Validation Failed: {e.errors()}"
+            logger.warning(error_msg)
+            
+            # Reflexion: Tell LLM what went wrong
+            history.add("assistant", response_text)
+            history.add("user", f"JSON valid, but schema invalid: {e}. Fix structure.")
 
-            except ValidationError as e:
-                error_msg = f"Schema Validation Failed: {e.errors()}"
-                logger.warning(error_msg)
-                
-                # Reflexion: Tell LLM what went wrong
-                history.add("assistant", response_text) # type: ignore
-                history.add("user", f"JSON valid, but schema invalid: {e}. Fix structure.")
-
-            except ValueError as e:
-                # This catches the JSON parsing errors from _parse_and_repair_json
-                error_msg = f"JSON Parsing Failed (even after repair): {str(e)}"
-                logger.warning(error_msg)
-                
-                history.add("assistant", response_text) # type: ignore
-                history.add("user", "Output was unreadable JSON. Output ONLY valid JSON.")
+        except ValueError as e:
+            # This catches the JSON parsing errors from _parse_and_repair_json
+            error_msg = f"JSON Parsing Failed (even after repair): {str(e)}"
+            logger.warning(error_msg)
+            
+            history.add("assistant", response_text)
+            history.add("user", "Output was unreadable JSON. Output ONLY valid JSON.")
+
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+
+        return None
 
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-                time.sleep(1)
 
-        raise Exception(f"Failed to generate valid {pydantic_model.__name__} after {retries} attempts.")
\ No newline at end of file
+class BatchingGenerator:
+    """
+    Dynamic batching in front of Generator.generate_one_shot_async.
+
+    Concurrent `generate` calls are collected and sent as one multi-task prompt when either
+    `max_batch` prompts are waiting or `max_wait` seconds passed since the first one arrived.
+    The LLM answers with {"items": [...]} in task order; if the batch fails or the item count
+    doesn't match, every prompt of that batch is retried on its own.
+    Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        generator: Generator,
+        pydantic_model: Type[T],
+        language: Optional[str] = None,
+        max_batch: int = 8,
+        max_wait: float = 0.2,
+        max_tokens_per_item: int = 2048,
+    ):
+        self.generator = generator
+        self.pydantic_model = pydantic_model
+        self.language = language
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_tokens_per_item = max_tokens_per_item
+        self._batch_model = create_model(
+            f"{pydantic_model.__name__}Batch",
+            items=(List[pydantic_model], ...),  # type: ignore[valid-type]
+        )
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def generate(self, prompt: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            # Keep a reference until done so the task isn't garbage collected
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        if len(batch) == 1:
+            await self._run_single(*batch[0])
+            return
+
+        tasks = "\n".join(
+            f"<task {i}>\n{prompt}\n</task {i}>" for i, (prompt, _) in enumerate(batch, start=1)
+        )
+        combined_prompt = (
+            f"Solve each of the following {len(batch)} tasks independently. "
+            f"Put the result of each task into `items`, in task order: exactly {len(batch)} items.\n"
+            f"{tasks}"
+        )
+
+        try:
+            result = await self.generator.generate_one_shot_async(
+                pydantic_model=self._batch_model,
+                prompt=combined_prompt,
+                language=self.language,
+                max_tokens=self.max_tokens_per_item * len(batch),
+            )
+            if len(result.items) != len(batch):
+                raise ValueError(f"Expected {len(batch)} items, got {len(result.items)}")
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} failed ({e}), retrying prompts one by one")
+            await asyncio.gather(*(self._run_single(prompt, future) for prompt, future in batch))
+            return
+
+        logger.info(f"Batch of {len(batch)} {self.pydantic_model.__name__} generated in one call")
+        for (_, future), item in zip(batch, result.items):
+            if not future.done():
+                future.set_result(item)
+
+    async def _run_single(self, prompt, future):
+        try:
+            result = await self.generator.generate_one_shot_async(
+                pydantic_model=self.pydantic_model,
+                prompt=prompt,
+                language=self.language,
+                max_tokens=self.max_tokens_per_item,
+            )
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
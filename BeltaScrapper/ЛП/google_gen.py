@@ -2,7 +2,7 @@ import os
 import logging
 from typing import Optional, List, Dict, Any
 from dotenv import load_dotenv
-from google.api_core import retry
+from google.api_core import retry, retry_async
 import google.generativeai as genai
 from google.generativeai import types
 from google.api_core import exceptions as google_exceptions
@@ -13,6 +13,9 @@ logger = get_logger(__name__)
 
 load_dotenv(override=True)
 
+# GenerativeModel instances kept per system prompt (the SDK binds the system prompt at construction)
+MODEL_CACHE_SIZE = 32
+
 class GoogleGenAI:
     def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
         """
@@ -32,8 +35,12 @@ class GoogleGenAI:
             logger.warning("No model name provided. Ensure GEMINI_MODEL is set. Defaulting to 'gemini-1.5-flash'.")
             self.model_name = "gemini-1.5-flash"
 
-        # Configure the global genai client
-        genai.configure(api_key=self.api_key) # pyright: ignore[reportPrivateImportUsage]
+        # Configure the global genai client. The SDK keeps one gRPC (HTTP/2) channel per client
+        # and reuses it for every model and call, so connections stay open between requests
+        genai.configure(api_key=self.api_key, transport="grpc") # pyright: ignore[reportPrivateImportUsage]
+
+        # system_prompt -> GenerativeModel, so every call doesn't build a new one
+        self._models: Dict[Optional[str], Any] = {}
 
     
     def get_model(self) -> str:
@@ -60,6 +67,42 @@ class GoogleGenAI:
             The generated text response.
         """
         
+        model_instance, contents, generation_config = self._prepare_request(
+            user, system_prompt, payload, temperature, max_tokens
+        )
+        retry_policy = retry.Retry(
+            predicate=retry.if_exception_type(google_exceptions.DeadlineExceeded),
+            initial=1.0, multiplier=2.0, maximum=60.0, deadline=600
+        )
+        try:
+            # We use generate_content. If there is history (contents > 1), strictly speaking
+            # we are passing a list of contents.
+            response = model_instance.generate_content(
+                contents=contents,
+                generation_config=generation_config,
+                stream=False, # Stream=False is easier for non-async usage
+                request_options={"timeout": 600, "retry": retry_policy}
+            )
+            
+            return self._response_text(response)
+
+        except google_exceptions.GoogleAPIError as e:
+            logger.error(f"Google API Error: {e}")
+            raise e
+        except ValueError as e:
+            logger.error(f"Value Error (often content safety): {e}")
+            raise e
+        except Exception as e:
+            logger.error(f"Unexpected error in Gemini client: {e}")
+            raise e
+
+    def _prepare_request(self,
+                         user: Optional[str],
+                         system_prompt: Optional[str],
+                         payload: Any,
+                         temperature: float,
+                         max_tokens: int):
+        """Build (model_instance, contents, generation_config) shared by complete() and acomplete()."""
         # --- 1. Prepare Message History (Contents) ---
         contents = []
         
@@ -83,12 +126,8 @@ class GoogleGenAI:
         if not contents:
             raise ValueError("No messages provided. Supply 'user' or 'payload'.")
 
-        # --- 3. Instantiate Model with System Prompt ---
-        # Google's SDK sets the system_instruction at instantiation, not per call.
-        model_instance = genai.GenerativeModel( # pyright: ignore[reportPrivateImportUsage]
-            model_name=self.model_name, # type: ignore
-            system_instruction=system_prompt if system_prompt else None
-        )
+        # --- 3. Get the Model for this System Prompt ---
+        model_instance = self._get_model(system_prompt)
 
         generation_config = types.GenerationConfig(
             temperature=temperature,
@@ -98,27 +137,56 @@ class GoogleGenAI:
         )
         
         logger.debug(f"Sending to Gemini ({self.model_name}): {len(contents)} messages")
-        retry_policy = retry.Retry(
+        return model_instance, contents, generation_config
+
+    def _get_model(self, system_prompt: Optional[str]):
+        # Google's SDK sets the system_instruction at instantiation, not per call.
+        system_prompt = system_prompt if system_prompt else None
+        model_instance = self._models.get(system_prompt)
+        if model_instance is None:
+            if len(self._models) >= MODEL_CACHE_SIZE:
+                self._models.clear()
+            model_instance = genai.GenerativeModel( # pyright: ignore[reportPrivateImportUsage]
+                model_name=self.model_name, # type: ignore
+                system_instruction=system_prompt
+            )
+            self._models[system_prompt] = model_instance
+        return model_instance
+
+    @staticmethod
+    def _response_text(response) -> str:
+        # Check if response was blocked (safety filters)
+        if not response.parts:
+            if response.prompt_feedback:
+                logger.warning(f"Gemini Safety Block: {response.prompt_feedback}")
+            raise ValueError("Gemini returned an empty response (likely safety block).")
+
+        return response.text
+
+    async def acomplete(self,
+                        user: Optional[str] = None,
+                        system_prompt: Optional[str] = None,
+                        payload: Any = None,
+                        temperature: float = 0.7,
+                        max_tokens: int = 1024) -> str:
+        """
+        Async variant of complete(), built on generate_content_async, so many requests
+        can be in flight on one event loop. Same arguments, return value and errors.
+        """
+        model_instance, contents, generation_config = self._prepare_request(
+            user, system_prompt, payload, temperature, max_tokens
+        )
+        retry_policy = retry_async.AsyncRetry(
             predicate=retry.if_exception_type(google_exceptions.DeadlineExceeded),
             initial=1.0, multiplier=2.0, maximum=60.0, deadline=600
         )
         try:
-            # We use generate_content. If there is history (contents > 1), strictly speaking
-            # we are passing a list of contents.
-            response = model_instance.generate_content(
+            response = await model_instance.generate_content_async(
                 contents=contents,
                 generation_config=generation_config,
-                stream=False, # Stream=False is easier for non-async usage
                 request_options={"timeout": 600, "retry": retry_policy}
             )
-            
-            # Check if response was blocked (safety filters)
-            if not response.parts:
-                if response.prompt_feedback:
-                    logger.warning(f"Gemini Safety Block: {response.prompt_feedback}")
-                raise ValueError("Gemini returned an empty response (likely safety block).")
-
-            return response.text
+            return self._response_text(response)
 
         except google_exceptions.GoogleAPIError as e:
             logger.error(f"Google API Error: {e}")
@@ -1,4 +1,7 @@
-from typing import Any, Dict, List, Optional
+import queue
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from neo4j import GraphDatabase
 import logging
 from schemas import KnowledgeGraph
@@ -6,20 +9,22 @@ from entity_normalizer import EntityNameNormalizer
 import sqlite3
 
 class Neo4jGraphManager:
-    def __init__(self, uri: str, auth: tuple, sqlite_db_path: str = "entities.db"):
+    def __init__(self, uri: str, auth: tuple, sqlite_db_path: str = "entities.db",
+                 entity_normalizer: Optional[EntityNameNormalizer] = None):
         self.driver = GraphDatabase.driver(uri, auth=auth)
         self.logger = logging.getLogger("Neo4jManager")
-        self.entity_normalizer = EntityNameNormalizer(sqlite_db_path)
+        # Reuse the caller's normalizer (and its SQLite connection/cache) when one is given
+        self.entity_normalizer = entity_normalizer or EntityNameNormalizer(sqlite_db_path)
         self.sqlite_db_path = sqlite_db_path
         
 
     def close(self):
         self.driver.close()
+        self.entity_normalizer.close()
 
     def _sanitize(self, val: Any) -> str:
         if isinstance(val, str):
-            safe_str = val.replace("'", "\\'")
-            safe_str.lower()
+            safe_str = val.replace("\\", "\\\\").replace("'", "\\'")
             return f"'{safe_str}'"
         elif isinstance(val, bool):
             return "true" if val else "false"
@@ -37,88 +42,57 @@ class Neo4jGraphManager:
                 entries.append(f"`{k}`: {self._sanitize(v)}") # Added backticks to keys for safety
         return "{" + ", ".join(entries) + "}"
 
-    def _build_rel_props_str(self, rel) -> str:
-    # Get only public data attributes (exclude private, methods, properties)
-        props_dict = {}
-        for attr_name in dir(rel):
-            if (attr_name.startswith('_') or           # Skip private attributes
-                callable(getattr(rel, attr_name)) or   # Skip methods
-                attr_name in {'__dict__', '__class__'}): # Skip special dunder attrs
-                continue
-                
-            attr_value = getattr(rel, attr_name)
-            if attr_value is not None:
-                props_dict[attr_name] = attr_value
-        
+    def _build_params_str(self, model, exclude: set) -> str:
+        # model_dump runs in pydantic-core; exclude the fields that are part of the Cypher pattern itself
+        props_dict = model.model_dump(exclude_none=True, exclude=exclude)
+
         if not props_dict:
             return ""
-        
-        # Cypher props string for parameter binding
-        props_str = ", ".join(f'{k}: ${k}' for k in props_dict)
-        return props_str
 
+        # Cypher props string for parameter binding
+        return ", ".join(f'`{k}`: ${k}' for k in props_dict)
 
+    def _build_rel_props_str(self, rel) -> str:
+        return self._build_params_str(rel, {"source", "target", "type"})
 
-    def _build_entity_props_str(self, rel) -> str:
-    # Get only public data attributes (exclude private, methods, properties)
-        props_dict = {}
-        for attr_name in dir(rel):
-            if (attr_name.startswith('_') or           # Skip private attributes
-                callable(getattr(rel, attr_name)) or   # Skip methods
-                attr_name in {'__dict__', '__class__'}): # Skip special dunder attrs
-                continue
-                
-            attr_value = getattr(rel, attr_name)
-            if attr_value is not None:
-                props_dict[attr_name] = attr_value
-        
-        if not props_dict:
-            return ""
-        
-        # Cypher props string for parameter binding
-        props_str = ", ".join(f'{k}: ${k}' for k in props_dict)
-        return props_str
+    def _build_entity_props_str(self, entity) -> str:
+        return self._build_params_str(entity, {"name", "label"})
 
-    def generate_cypher(self, graph_data: 'KnowledgeGraph', src_filename=None) -> List[str]:
+    def generate_cypher(self, graph_data: 'KnowledgeGraph', src_filename=None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (cypher, params) pairs; values are always bound as parameters so Neo4j can reuse the plan."""
         queries = []
 
         # --- STEP 1: Process Nodes ---
         for entity in graph_data.entities:
-            safe_name = self._sanitize(entity.name)
-            props_str = self._build_entity_props_str(entity)
-
-            # Update: ON MATCH now updates properties too
             query = (
-                f"MERGE (n {{name: {safe_name}}})"
-                f"ON CREATE SET n:{entity.label}"
+                "MERGE (n {name: $name}) "
+                f"ON CREATE SET n:`{entity.label}`"
             )
-            queries.append(query)
+            queries.append((query, {"name": entity.name}))
 
         # --- STEP 2: Process Relationships ---
         for rel in graph_data.relationships:
-            source_safe = self._sanitize(rel.source)
-            target_safe = self._sanitize(rel.target)
-
-            # Build relationship properties using the new method that includes dates
-            rel_props_str = self._build_rel_props_str(rel)
-
-            # Get source_file separately for the source files list
-            source_file_val = self._sanitize(src_filename) if src_filename else "null"
-
             # Merge on TYPE only (not properties), then accumulate evidence
             query = (
-                f"MATCH (a {{name: {source_safe}}}) "
-                f"MATCH (b {{name: {target_safe}}}) "
-                f"MERGE (a)-[r:{rel.type}]->(b) "
-                f"ON CREATE SET r += {rel_props_str}, "
-                f"r.source_files = [{source_file_val}], "
-                f"r.created_at = timestamp() "
-                f"ON MATCH SET "
-                f"r += {rel_props_str}, "
-                f"r.source_files = CASE WHEN {source_file_val} IN r.source_files THEN r.source_files ELSE r.source_files + {source_file_val} END, "
-                f"r.updated_at = timestamp()"
+                "MATCH (a {name: $source}) "
+                "MATCH (b {name: $target}) "
+                f"MERGE (a)-[r:`{rel.type}`]->(b) "
+                "ON CREATE SET r += $props, "
+                "r.source_files = CASE WHEN $src_file IS NULL THEN [] ELSE [$src_file] END, "
+                "r.created_at = timestamp() "
+                "ON MATCH SET "
+                "r += $props, "
+                "r.source_files = CASE WHEN $src_file IS NULL OR $src_file IN r.source_files "
+                "THEN r.source_files ELSE r.source_files + $src_file END, "
+                "r.updated_at = timestamp()"
             )
-            queries.append(query)
+            params = {
+                "source": rel.source,
+                "target": rel.target,
+                "props": self._get_relationship_properties(rel),
+                "src_file": src_filename,
+            }
+            queries.append((query, params))
 
         return queries
     
@@ -137,57 +111,114 @@ class Neo4jGraphManager:
         
         return props
     
-    def execute_graph(self, graph_data: 'KnowledgeGraph', src_filename: Optional[str] = None):
-        processed_graph_data = self.entity_normalizer.normalize_entity_names(graph_data)
+    def execute_graph(self, graph_data: 'KnowledgeGraph', src_filename: Optional[str] = None) -> bool:
+        return self.execute_graphs([(graph_data, src_filename)])
 
-        with self.driver.session() as session:
-            # --- STEP 1: Create nodes ---
+    def execute_graphs(self, graphs: List[Tuple['KnowledgeGraph', Optional[str]]]) -> bool:
+        """
+        Write several (graph, src_filename) pairs in a single managed transaction.
+        Failures are logged, not raised; returns True only if the transaction was committed.
+        """
+        # Nodes carry nothing but name and label, so they are deduplicated across the whole batch;
+        # the first label seen for a name is the one it gets created with
+        entity_labels: Dict[str, str] = {}
+        batches = []
+        rel_count = 0
+        for graph_data, src_filename in graphs:
+            processed_graph_data = self.entity_normalizer.normalize_entity_names(graph_data)
             for entity in processed_graph_data.entities:
-                query = """
-                MERGE (n {name: $name})
-                ON CREATE SET n:`%s`
-                """ % entity.label
-
-                try:
-                    session.run(query, name=entity.name) # type: ignore
-                    self.logger.info(f"Created/merged entity: {entity.name}")
-                except Exception as e:
-                    self.logger.error(f"Failed to create entity {entity.name}: {e}")
-
-            # --- STEP 2: Create relationships ---
+                entity_labels.setdefault(entity.name, entity.label)
+
+            # Relationships MERGE on (source, type, target) and apply `r += row.props` row by row.
+            # Props only hold the fields each duplicate actually set, so merging them in row order
+            # (later values win, keys only an earlier duplicate carried survive) writes the same result
+            unique_rels: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
             for rel in processed_graph_data.relationships:
-                rel_props = self._get_relationship_properties(rel)
-
-                query = f"""
-                MATCH (a {{name: $source}})
-                MATCH (b {{name: $target}})
-                MERGE (a)-[r:`{rel.type}`]->(b)
-                ON CREATE SET 
-                    r += $props,
-                    r.source_files = CASE WHEN $src_file IS NULL THEN [] ELSE [$src_file] END,
-                    r.created_at = timestamp()
-                ON MATCH SET 
-                    r += $props,
-                    r.source_files = CASE 
-                        WHEN $src_file IS NULL THEN r.source_files
-                        WHEN $src_file IN r.source_files THEN r.source_files
-                        ELSE r.source_files + $src_file
-                    END,
-                    r.updated_at = timestamp()
-                """
-
-                params = {
-                    "source": rel.source,
-                    "target": rel.target,
-                    "props": rel_props,
-                    "src_file": src_filename
-                }
-
-                try:
-                    session.run(query, params) # type: ignore
-                    self.logger.info(f"Created/merged relationship: {rel.source} -[{rel.type}]-> {rel.target}")
-                except Exception as e:
-                    self.logger.error(f"Failed to create relationship {rel.source} -[{rel.type}]-> {rel.target}: {e}")
+                unique_rels.setdefault((rel.source, rel.type, rel.target), {}).update(
+                    self._get_relationship_properties(rel)
+                )
+            rel_count += len(unique_rels)
+
+            # Relationship types can't be parameterized, so batch rows per type
+            rels_by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for (source, rel_type, target), props in unique_rels.items():
+                rels_by_type[rel_type].append({
+                    "source": source,
+                    "target": target,
+                    "props": props,
+                })
+
+            batches.append((rels_by_type, src_filename))
+
+        # Labels can't be parameterized either, so batch nodes per label
+        entities_by_label: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for name, label in entity_labels.items():
+            entities_by_label[label].append({"name": name})
+
+        with self.driver.session() as session:
+            try:
+                session.execute_write(self._write_graphs_tx, entities_by_label, batches)
+                self.logger.info(
+                    f"Created/merged {len(entity_labels)} entities and {rel_count} relationships "
+                    f"from {len(batches)} file(s)"
+                )
+                return True
+            except Exception as e:
+                src_files = [src_filename for _, src_filename in batches]
+                self.logger.error(f"Failed to write graph for {src_files}: {e}")
+                return False
+
+    @classmethod
+    def _write_graphs_tx(cls, tx, entities_by_label, batches):
+        cls._write_entities_tx(tx, entities_by_label)
+        for rels_by_type, src_filename in batches:
+            cls._write_relationships_tx(tx, rels_by_type, src_filename)
+
+    @staticmethod
+    def _write_entities_tx(tx, entities_by_label):
+        for label, rows in entities_by_label.items():
+            query = """
+            UNWIND $rows AS row
+            MERGE (n {name: row.name})
+            ON CREATE SET n:`%s`
+            """ % label
+            tx.run(query, rows=rows)
+
+    @staticmethod
+    def _write_relationships_tx(tx, rels_by_type, src_filename):
+        for rel_type, rows in rels_by_type.items():
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (a {{name: row.source}})
+            MATCH (b {{name: row.target}})
+            MERGE (a)-[r:`{rel_type}`]->(b)
+            ON CREATE SET 
+                r += row.props,
+                r.source_files = CASE WHEN $src_file IS NULL THEN [] ELSE [$src_file] END,
+                r.created_at = timestamp()
+            ON MATCH SET 
+                r += row.props,
+                r.source_files = CASE 
+                    WHEN $src_file IS NULL THEN r.source_files
+                    WHEN $src_file IN r.source_files THEN r.source_files
+                    ELSE r.source_files + $src_file
+                END,
+                r.updated_at = timestamp()
+            """
+            tx.run(query, rows=rows, src_file=src_filename)
+
+    def add_source_file(self, existing_src: str, new_src: str):
+        """Record new_src as a source of every relationship extracted from existing_src (same content)."""
+        query = """
+        MATCH ()-[r]->()
+        WHERE $existing_src IN r.source_files AND NOT $new_src IN r.source_files
+        SET r.source_files = r.source_files + $new_src
+        """
+        with self.driver.session() as session:
+            try:
+                session.execute_write(lambda tx: tx.run(query, existing_src=existing_src, new_src=new_src).consume())
+            except Exception as e:
+                self.logger.error(f"Failed to add source file {new_src}: {e}")
 
     def clear_entities_db(self):
         """Clear all entities from the SQLite database using the entity normalizer."""
@@ -197,4 +228,59 @@ class Neo4jGraphManager:
         # Important: Run this once to make lookups fast
         query = "CREATE CONSTRAINT IF NOT EXISTS FOR (n:Entity) REQUIRE n.name IS UNIQUE"
         with self.driver.session() as session:
-            session.run(query)
\ No newline at end of file
+            session.run(query)
+
+
+class GraphBatchWriter:
+    """
+    Single daemon thread that owns Neo4j graph writes.
+
+    Producers hand off (graph, src_filename) and go back to the LLM stage; the writer
+    commits every `batch_size` graphs (or whatever is pending on close) in one transaction.
+    A graph's `on_written` callback runs on the writer thread once its transaction is committed,
+    and never if the write failed.
+    """
+
+    def __init__(self, manager: Neo4jGraphManager, batch_size: int = 10):
+        self._manager = manager
+        self._batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="neo4j-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, graph_data: KnowledgeGraph, src_filename: Optional[str] = None,
+               on_written: Optional[Callable[[], Any]] = None):
+        self._queue.put((graph_data, src_filename, on_written))
+
+    def close(self):
+        """Flush every pending graph and stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        pending = []
+        while True:
+            item = self._queue.get()
+            if item is not None:
+                pending.append(item)
+            if pending and (item is None or len(pending) >= self._batch_size):
+                self._write(pending)
+                pending = []
+            if item is None:
+                return
+
+    def _write(self, pending):
+        try:
+            written = self._manager.execute_graphs([(graph_data, src_filename) for graph_data, src_filename, _ in pending])
+        except Exception as e:
+            self._manager.logger.error(f"Failed to write batch of {len(pending)} graph(s): {e}")
+            return
+        if not written:
+            return
+        for _, src_filename, on_written in pending:
+            if on_written is None:
+                continue
+            try:
+                on_written()
+            except Exception as e:
+                self._manager.logger.error(f"Post-write callback failed for {src_filename}: {e}")
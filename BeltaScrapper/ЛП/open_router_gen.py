@@ -1,8 +1,12 @@
 import os
-import json
 import logging
+import importlib.util
+import httpx
+import orjson
 import requests
-from typing import Optional, List, Dict, Any, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Optional, List, Dict, Any, Iterator, Union
 from dotenv import load_dotenv
 
 from logger_config import get_logger
@@ -11,6 +15,12 @@ logger = get_logger(__name__)
 
 load_dotenv(override=True)
 
+# (connect, read) timeouts; generations can take a while to come back
+REQUEST_TIMEOUT = (5, 120)
+
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 class OpenRouterGenAI:
     def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
         """
@@ -30,6 +40,27 @@ class OpenRouterGenAI:
         if not self.model_name:
             logger.warning("No model name provided. Ensure OR_MODEL is set or pass model_name.")
 
+        # Headers don't change between calls, build them once
+        self._static_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            # "HTTP-Referer": "http://localhost", # Optional: Required by OpenRouter for ranking
+            # "X-Title": "My App", # Optional: Required by OpenRouter for ranking
+        }
+
+        # Pooled keep-alive connections: only the first call pays for the TLS handshake
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"POST"}),
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
+
+        # Async client for acomplete(), created on first use
+        self._aclient: Optional[httpx.AsyncClient] = None
+
     def get_model(self) -> str:
         return self.model_name if self.model_name else "model_name is not accessible"
     
@@ -55,6 +86,128 @@ class OpenRouterGenAI:
         Raises:
             requests.exceptions.RequestException: If the API call fails.
         """
+        data = self._build_request(user, system_prompt, payload, temperature, max_tokens)
+
+        # Debug log (only shows if logging level is DEBUG); guarded so the payload isn't serialized at all otherwise
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Payload sending to OpenRouter: {orjson.dumps(data['messages'], option=orjson.OPT_INDENT_2).decode()}")
+        
+        try:
+            response = self.session.post(self.base_url, headers=self._static_headers, data=orjson.dumps(data), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            
+            return self._extract_content(orjson.loads(response.content))
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API Request failed: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                logger.error(f"Status Code: {e.response.status_code}")
+                logger.error(f"Response Body: {e.response.text}")
+            
+            # Re-raise the exception so the calling application knows it failed
+            raise e
+        except (KeyError, IndexError) as e:
+            logger.error(f"Malformed response format: {e}")
+            raise ValueError("Unexpected response format from OpenRouter") from e
+
+    def complete_stream(self,
+                        user: Optional[str] = None,
+                        system_prompt: Optional[str] = None,
+                        payload: Any = None,
+                        temperature: float = 0.7,
+                        max_tokens: int = 1024) -> Iterator[str]:
+        """
+        Same as complete(), but yields the response text piece by piece as OpenRouter streams it (SSE),
+        so callers can start working before the generation is finished.
+
+        Raises:
+            requests.exceptions.RequestException: If the API call fails or the stream reports an error.
+        """
+        data = self._build_request(user, system_prompt, payload, temperature, max_tokens)
+        data["stream"] = True
+
+        try:
+            with self.session.post(self.base_url, headers=self._static_headers, data=orjson.dumps(data),
+                                   timeout=REQUEST_TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+
+                # Decode per line ourselves: without a charset requests would assume latin-1 for text/event-stream
+                for raw_line in response.iter_lines():
+                    line = raw_line.decode("utf-8")
+                    # Skip keep-alive blank lines and SSE comments (": OPENROUTER PROCESSING")
+                    if not line or not line.startswith("data:"):
+                        continue
+
+                    frame = line[len("data:"):].strip()
+                    if frame == "[DONE]":
+                        break
+
+                    chunk = orjson.loads(frame)
+                    if 'error' in chunk:
+                        raise requests.exceptions.HTTPError(f"OpenRouter Error: {chunk['error']}")
+
+                    choices = chunk.get('choices')
+                    if choices:
+                        content = choices[0].get('delta', {}).get('content')
+                        if content:
+                            yield content
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API Request failed: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                logger.error(f"Status Code: {e.response.status_code}")
+            raise e
+
+    async def acomplete(self,
+                        user: Optional[str] = None,
+                        system_prompt: Optional[str] = None,
+                        payload: Any = None,
+                        temperature: float = 0.7,
+                        max_tokens: int = 1024) -> str:
+        """
+        Async variant of complete(); lets callers fan out many requests with asyncio.gather.
+        Same arguments, return value and errors as complete(), except HTTP failures raise httpx.HTTPError.
+        """
+        data = self._build_request(user, system_prompt, payload, temperature, max_tokens)
+
+        try:
+            response = await self._get_async_client().post(self.base_url, headers=self._static_headers, content=orjson.dumps(data))
+            response.raise_for_status()
+            return self._extract_content(orjson.loads(response.content))
+
+        except httpx.HTTPError as e:
+            logger.error(f"API Request failed: {e}")
+            if isinstance(e, httpx.HTTPStatusError):
+                logger.error(f"Status Code: {e.response.status_code}")
+                logger.error(f"Response Body: {e.response.text}")
+            raise e
+        except (KeyError, IndexError) as e:
+            logger.error(f"Malformed response format: {e}")
+            raise ValueError("Unexpected response format from OpenRouter") from e
+
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        # Created lazily so it binds to the event loop that actually uses it
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(120, connect=5),
+                limits=httpx.Limits(max_connections=32),
+            )
+        return self._aclient
+
+    async def aclose(self):
+        """Close the async HTTP client, if it was created."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    def _build_request(self,
+                       user: Optional[str],
+                       system_prompt: Optional[str],
+                       payload: Any,
+                       temperature: float,
+                       max_tokens: int) -> Dict[str, Any]:
+        """Build the chat completion request body shared by complete() and acomplete()."""
         messages: List[Dict[str, str]] = []
 
         # 1. Handle System Prompt
@@ -86,47 +239,20 @@ class OpenRouterGenAI:
         if not messages:
             raise ValueError("No messages provided. Supply 'user', 'payload', or 'system_prompt'.")
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-            # "HTTP-Referer": "http://localhost", # Optional: Required by OpenRouter for ranking
-            # "X-Title": "My App", # Optional: Required by OpenRouter for ranking
-        }
-
-        data = {
+        return {
             "model": self.model_name,
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
         }
 
-        # Debug log (only shows if logging level is DEBUG)
-        logger.debug(f"Payload sending to OpenRouter: {json.dumps(messages, indent=2, ensure_ascii=False)}")
-        
-        try:
-            response = requests.post(self.base_url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            # OpenRouter specific: Check for non-standard error structures
-            if 'error' in result:
-                raise requests.exceptions.HTTPError(f"OpenRouter Error: {result['error']}")
+    @staticmethod
+    def _extract_content(result: Dict[str, Any]) -> str:
+        # OpenRouter specific: Check for non-standard error structures
+        if 'error' in result:
+            raise requests.exceptions.HTTPError(f"OpenRouter Error: {result['error']}")
 
-            content = result['choices'][0]['message']['content']
-            return content
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API Request failed: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Status Code: {e.response.status_code}")
-                logger.error(f"Response Body: {e.response.text}")
-            
-            # Re-raise the exception so the calling application knows it failed
-            raise e
-        except (KeyError, IndexError) as e:
-            logger.error(f"Malformed response format: {e}")
-            raise ValueError("Unexpected response format from OpenRouter") from e
+        return result['choices'][0]['message']['content']
 
 # Example Usage
 if __name__ == "__main__":
@@ -1,25 +1,51 @@
 from pprint import pprint
-import random
-import time
+import asyncio
+import hashlib
 import os
 import logging
 import spacy
-from tqdm.contrib.concurrent import thread_map
+from spacy.matcher import PhraseMatcher
+from functools import lru_cache, partial
+from itertools import groupby, islice
+from operator import itemgetter
+from tqdm import tqdm
 
-from generator import Generator, measure_time
+from generator import BatchingGenerator, Generator, measure_time
 from lcpp_gen import LlamaCppGenAI
 from google_gen import GoogleGenAI
-from neo4j_manager import Neo4jGraphManager
+from neo4j_manager import GraphBatchWriter, Neo4jGraphManager
 from entity_normalizer import EntityNameNormalizer
+from processed_texts import ProcessedTextsStore
 from schemas import KnowledgeGraph
 from logger_config import get_logger
-from utils import apply_to_all_files
+from utils import apply_to_all_files, create_pool
 
 logger = get_logger(__name__)
 
+# Only NER output is used, so the other components are not even loaded
+NER_EXCLUDED_PIPES = ["tok2vec", "morphologizer", "parser", "attribute_ruler", "lemmatizer", "senter"]
+NER_BATCH_SIZE = 50
+# Long texts are fed to NER in pieces of this many characters instead of raising nlp.max_length
+NER_CHUNK_CHARS = 100_000
+# NER labels whose spans are looked up in the entity context
+_WANTED_LABELS = frozenset(("PER", "ORG", "LOC", "GPE"))
+# Files where the known-names gazetteer finds fewer names than this also go through spaCy NER
+GAZETTEER_MIN_HITS = 3
+# Number of files whose graphs are committed to Neo4j in one transaction
+GRAPH_WRITE_BATCH = 10
+# Files in flight at once in load_from_list (bounds concurrent LLM requests)
+LLM_CONCURRENCY = 20
+# Dynamic batching of KG prompts: flush at this many prompts or after this many seconds
+KG_BATCH_SIZE = 4
+KG_BATCH_WAIT = 0.2
+# Extracted graphs are cached on disk by prompt + model, so re-ingested articles skip the LLM
+KG_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kg_cache")
+# Texts shorter than this (after stripping) are not worth an LLM call
+MIN_TEXT_CHARS = 100
+
 # Load Spacy
 try:
-    nlp = spacy.load("ru_core_news_lg")
+    nlp = spacy.load("ru_core_news_lg", exclude=NER_EXCLUDED_PIPES)
 except OSError:
     logger.warning("Spacy model 'ru_core_news_lg' not found. Please install it using: python -m spacy download ru_core_news_lg")
     # Fallback to prevent crash if not installed, though detection will fail
@@ -28,7 +54,8 @@ except OSError:
 # Initialize Components
 generator = Generator(client=GoogleGenAI())
 normalizer = EntityNameNormalizer()
-neo = Neo4jGraphManager(uri="bolt://localhost:7687", auth=("neo4j", "11111111"))
+processed_texts = ProcessedTextsStore()
+neo = Neo4jGraphManager(uri="bolt://localhost:7687", auth=("neo4j", "11111111"), entity_normalizer=normalizer)
 
 # Ensure indexes exist to prevent duplication race conditions
 try:
@@ -43,21 +70,120 @@ except Exception as e:
 #     user="root", password="nebula", space="knowledge_graph"
 # )
 
+def _split_text(text: str) -> list[str]:
+    """Split text into pieces of at most NER_CHUNK_CHARS, preferring to cut on whitespace."""
+    if len(text) <= NER_CHUNK_CHARS:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + NER_CHUNK_CHARS, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start, end)
+            if cut > start:
+                end = cut
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+def _extract_names(docs) -> list[str]:
+    # Extract entities relevant for context lookup (Person, Org, GPE, Loc)
+    return list({ent.text for doc in docs for ent in doc.ents if ent.label_ in _WANTED_LABELS})
+
+# PhraseMatcher over the normalizer's entity names, built on first use and grown as names are added
+_gazetteer = None
+_gazetteer_size = 0
+
+def _get_gazetteer() -> PhraseMatcher:
+    global _gazetteer, _gazetteer_size
+    known_count = normalizer.known_names_count()
+    if _gazetteer is None or known_count < _gazetteer_size:
+        # First use, or the entity DB was cleared since
+        _gazetteer = PhraseMatcher(nlp.vocab, attr="LOWER")
+        _gazetteer_size = 0
+    if known_count > _gazetteer_size:
+        # Only the names added since the last call are copied and tokenized
+        new_names = normalizer.names_since(_gazetteer_size)
+        _gazetteer.add("KNOWN_ENTITY", list(nlp.tokenizer.pipe(new_names)))
+        _gazetteer_size += len(new_names)
+    return _gazetteer
+
+def _match_known_names(chunks) -> set[str]:
+    # Tokenizer + PhraseMatcher only, no statistical model involved
+    gazetteer = _get_gazetteer()
+    return {doc[start:end].text for doc in nlp.tokenizer.pipe(chunks) for _, start, end in gazetteer(doc)}
+
 def detect_names(text: str) -> list[str]:
-    """Detect potential entity names in the text using Spacy."""
+    """
+    Detect potential entity names in the text: names already known to the normalizer are found
+    with a PhraseMatcher, and spaCy NER only runs when that finds fewer than GAZETTEER_MIN_HITS.
+    """
     if not nlp:
         return []
-    
-    # Increase max length for large files
-    nlp.max_length = max(len(text) + 1000, nlp.max_length)
-    
-    doc = nlp(text)
-    # Extract entities relevant for context lookup (Person, Org, GPE, Loc)
-    names = set([ent.text for ent in doc.ents if ent.label_ in ["PER", "ORG", "LOC", "GPE"]])
-    return list(set(names))
 
-def get_KG_from_text(text, context_info=""):
-    # LLM generates pydantic schema
+    chunks = _split_text(text)
+    names = _match_known_names(chunks)
+    if len(names) < GAZETTEER_MIN_HITS:
+        names.update(_extract_names(nlp.pipe(chunks)))
+    return list(names)
+
+def _read_files(filenames):
+    """Yield (text, filename) for each readable file, skipping missing ones."""
+    for filename in filenames:
+        clean_filename = filename.strip()
+        if not os.path.exists(clean_filename):
+            logger.error(f"File not found: {clean_filename}")
+            continue
+        try:
+            with open(clean_filename, "r", encoding="utf-8") as f:
+                text = f.read()
+        except Exception as e:
+            logger.error(f"Error reading file {clean_filename}: {e}", exc_info=True)
+            continue
+
+        if _skip_text(clean_filename, text):
+            continue
+
+        yield text, clean_filename
+
+def detect_names_batch(filenames):
+    """
+    detect_names() for many files. Files the gazetteer doesn't cover are run through NER
+    together with nlp.pipe, which batches documents instead of paying the per-call
+    pipeline overhead of nlp(text). Yields (filename, text, names), not necessarily in order.
+    """
+    texts = _read_files(filenames)
+    if not nlp:
+        for text, filename in texts:
+            yield filename, text, []
+        return
+
+    # Files are taken NER_BATCH_SIZE at a time, so at most one window of texts is held in memory
+    while True:
+        window = list(islice(texts, NER_BATCH_SIZE))
+        if not window:
+            return
+
+        needs_ner = []
+        for text, filename in window:
+            chunks = _split_text(text)
+            names = _match_known_names(chunks)
+            if len(names) >= GAZETTEER_MIN_HITS:
+                yield filename, text, list(names)
+            else:
+                needs_ner.append((filename, text, chunks, names))
+
+        # Every remaining file becomes one or more (chunk, file_index) pairs; pipe() keeps the order,
+        # so the chunks of one file come out next to each other
+        pairs = ((chunk, file_index) for file_index, (_, _, chunks, _) in enumerate(needs_ner) for chunk in chunks)
+        docs = nlp.pipe(pairs, as_tuples=True, batch_size=NER_BATCH_SIZE)
+        for file_index, group in groupby(docs, key=itemgetter(1)):
+            filename, text, _, names = needs_ner[file_index]
+            names.update(_extract_names(doc for doc, _ in group))
+            yield filename, text, list(names)
+
+def _kg_prompt(text, context_info=""):
     prompt_content = f"""
         Используй следующие имена, в том виде, в каком они встречаются поле `известные имена`, если они есть. Если их нет или они не относятся к контексту статьи, просто игнорируй это поле.
         <известные имена>
@@ -73,7 +199,7 @@ def get_KG_from_text(text, context_info=""):
         Сгенерируй граф знаний. Следуй этим строгим правилам моделирования:
 
         1. НЕ сохраняй "Должность" или "Местоположение" как свойство внутри Человека.
-        2. Вместо этого создай отдельную Сущность (Label: 'Role' или 'Location').
+        2. Вместо этого создай отдельную Сущность (Label: 'Role', а для местоположения 'City' или 'Country').
         3. Создай связь между Человеком и Ролью.
         4. Связи (Relationships) должны содержать поле "reasoning", объясняющее причину создания этой связи.
         5. ХРАНИ ВСЕ ДАТЫ в СВЯЗЯХ, а не в сущностях. Используй поля start_date, end_date, date.
@@ -102,13 +228,115 @@ def get_KG_from_text(text, context_info=""):
         *   **context:** Дополнительный контекст.
     """
 
+    return prompt_content + instructions
+
+def _kg_cache_key(prompt: str) -> str:
+    # The prompt already holds text, context and instructions; the model changes the output too
+    key_src = f"{generator.client.get_model()}\0{prompt}"
+    return hashlib.blake2b(key_src.encode("utf-8"), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=2048)
+def _read_cached_kg(key: str) -> str:
+    # Misses raise FileNotFoundError, and lru_cache doesn't remember exceptions
+    with open(os.path.join(KG_CACHE_DIR, f"{key}.json"), "r", encoding="utf-8") as f:
+        return f.read()
+
+def _get_cached_kg(key: str):
+    try:
+        # A fresh model on every hit: the normalizer renames entities in place
+        return KnowledgeGraph.model_validate_json(_read_cached_kg(key))
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logger.warning(f"Ignoring broken KG cache entry {key}: {e}")
+        return None
+
+def _put_cached_kg(key: str, graph):
+    if graph is None:
+        return
+    try:
+        os.makedirs(KG_CACHE_DIR, exist_ok=True)
+        path = os.path.join(KG_CACHE_DIR, f"{key}.json")
+        # Write then rename, so a concurrent reader never sees half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(graph.model_dump_json())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write KG cache entry {key}: {e}")
+
+def get_KG_from_text(text, context_info=""):
+    prompt = _kg_prompt(text, context_info)
+    key = _kg_cache_key(prompt)
+    cached = _get_cached_kg(key)
+    if cached is not None:
+        logger.info(f"KG cache hit: {key}")
+        return cached
+
+    # LLM generates pydantic schema
     res = generator.generate_one_shot(
         pydantic_model=KnowledgeGraph,
         language="Russian",
-        prompt=prompt_content + instructions
+        prompt=prompt
     )
+    _put_cached_kg(key, res)
     return res
 
+async def get_KG_from_text_async(text, context_info="", batcher=None):
+    prompt = _kg_prompt(text, context_info)
+    key = _kg_cache_key(prompt)
+    cached = _get_cached_kg(key)
+    if cached is not None:
+        logger.info(f"KG cache hit: {key}")
+        return cached
+
+    if batcher is not None:
+        res = await batcher.generate(prompt)
+    else:
+        res = await generator.generate_one_shot_async(
+            pydantic_model=KnowledgeGraph,
+            language="Russian",
+            prompt=prompt
+        )
+    _put_cached_kg(key, res)
+    return res
+
+def build_context_str(clean_filename, detected_names) -> str:
+    """Look up known entities for the detected names and format them for the prompt."""
+    context_matches = normalizer.get_relevant_context(detected_names)
+
+    context_str = ""
+    if context_matches:
+        context_str = "/n### СПРАВОЧНАЯ ИНФОРМАЦИЯ (КОНТЕКСТ):/n"
+        for match in context_matches:
+            if match.get('description'):
+                context_str += f"- {match['original_name']} -> {match['matched_name']} (Описание: {match['description']})/n"
+            else:
+                context_str += f"- {match['original_name']} -> {match['matched_name']}/n"
+        logger.info(f"Found {len(context_matches)} context items for {clean_filename}")
+    return context_str
+
+def _skip_text(clean_filename, text) -> bool:
+    """
+    True for texts that shouldn't reach the LLM: near-empty ones, and exact copies of an
+    already processed file (whose relationships just get this file added as a source).
+    A hash is only recorded once its graph is committed to Neo4j, so the original's
+    relationships are always there to take the new source; a copy read while the original
+    is still queued on the GraphBatchWriter goes through the pipeline like any new text.
+    """
+    if len(text.strip()) < MIN_TEXT_CHARS:
+        logger.info(f"Skipping {clean_filename}: shorter than {MIN_TEXT_CHARS} characters")
+        return True
+
+    processed_as = processed_texts.get_filename(processed_texts.text_hash(text))
+    if processed_as is None:
+        return False
+
+    logger.info(f"Skipping {clean_filename}: same content as {processed_as}")
+    if processed_as != clean_filename:
+        neo.add_source_file(processed_as, clean_filename)
+    return True
+
 def process_file(filename):
     clean_filename = filename.strip()
     if not os.path.exists(clean_filename):
@@ -118,33 +346,84 @@ def process_file(filename):
     try:
         with open(clean_filename, "r", encoding="utf-8") as f:
             text = f.read()
-        
-        # Artificial delay from original code
-        time.sleep(random.randint(0, 20) / 10)
-        
-        # 1. Pipeline: Detect Names & Get Context
+
+        if _skip_text(clean_filename, text):
+            return
+
+        # 1. Pipeline: Detect Names
         detected_names = detect_names(text)
-        context_matches = normalizer.get_relevant_context(detected_names)
-
-        context_str = ""
-        if context_matches:
-            context_str = "/n### СПРАВОЧНАЯ ИНФОРМАЦИЯ (КОНТЕКСТ):/n"
-            for match in context_matches:
-                if match.get('description'):
-                    context_str += f"- {match['original_name']} -> {match['matched_name']} (Описание: {match['description']})/n"
-                else:
-                    context_str += f"- {match['original_name']} -> {match['matched_name']}/n"
-            logger.info(f"Found {len(context_matches)} context items for {clean_filename}")
+    except Exception as e:
+        logger.error(f"Error processing file {clean_filename}: {e}", exc_info=True)
+        return
+
+    process_text(clean_filename, text, detected_names)
+
+def process_text(clean_filename, text, detected_names):
+    """Context lookup -> LLM -> Neo4j for a file whose names were already detected."""
+    try:
+        # 2. Get Context
+        context_str = build_context_str(clean_filename, detected_names)
 
         res = get_KG_from_text(text, context_str)
 
         logger.info(f"Saving to Neo4j: {clean_filename}")
-        neo.execute_graph(res, filename) # type: ignore
+        # Only a committed graph counts as processed; a failed write is retried on the next run
+        if neo.execute_graph(res, clean_filename): # type: ignore
+            processed_texts.mark_processed(processed_texts.text_hash(text), clean_filename)
             
     except Exception as e:
         logger.error(f"Error processing file {clean_filename}: {e}", exc_info=True)
         return
    
+async def process_text_async(clean_filename, text, detected_names, slots, writer, batcher=None):
+    """
+    Async counterpart of process_text: the LLM call is awaited, the SQLite context lookup
+    runs on a worker thread, and the graph is queued on the writer, which marks the text as
+    processed once the graph's batch is committed. Releases one of `slots` when done.
+    """
+    try:
+        # 2. Get Context
+        context_str = await asyncio.to_thread(build_context_str, clean_filename, detected_names)
+
+        res = await get_KG_from_text_async(text, context_str, batcher)
+
+        logger.info(f"Saving to Neo4j: {clean_filename}")
+        writer.submit(
+            res, clean_filename,
+            on_written=partial(processed_texts.mark_processed, processed_texts.text_hash(text), clean_filename)
+        )
+
+    except Exception as e:
+        logger.error(f"Error processing file {clean_filename}: {e}", exc_info=True)
+    finally:
+        slots.release()
+
+async def _process_files_async(filename_list):
+    # Bounded concurrency: at most LLM_CONCURRENCY files past NER and waiting on the LLM
+    slots = asyncio.Semaphore(LLM_CONCURRENCY)
+    # Graphs are committed to Neo4j several files per transaction by the writer thread
+    writer = GraphBatchWriter(neo, batch_size=GRAPH_WRITE_BATCH)
+    batcher = BatchingGenerator(
+        generator, KnowledgeGraph, language="Russian", max_batch=KG_BATCH_SIZE, max_wait=KG_BATCH_WAIT
+    )
+    names_iter = detect_names_batch(filename_list)
+    tasks = []
+    try:
+        with tqdm(total=len(filename_list), desc="Processing files", unit="file") as progress:
+            while True:
+                await slots.acquire()
+                # NER is CPU-bound: step the batched spaCy generator on a worker thread
+                item = await asyncio.to_thread(next, names_iter, None)
+                if item is None:
+                    slots.release()
+                    break
+                task = asyncio.create_task(process_text_async(*item, slots, writer, batcher))
+                task.add_done_callback(lambda _: progress.update())
+                tasks.append(task)
+            await asyncio.gather(*tasks)
+    finally:
+        await asyncio.to_thread(writer.close)
+
 @measure_time
 def load_from_list(filename):
     if not os.path.exists(filename):
@@ -153,9 +432,8 @@ def load_from_list(filename):
 
     with open(filename, "r", encoding="utf-8") as f:
         filename_list = f.readlines()
-        
-    # Process files
-    results = thread_map(process_file, filename_list, max_workers=5)        
+
+    asyncio.run(_process_files_async(filename_list))
 
 if __name__ == "__main__":
     # Clear DB if needed, or keeping persistent. 
@@ -168,12 +446,15 @@ if __name__ == "__main__":
     # Construct absolute path to info.md
     # info_md_path = os.path.join(script_dir, "info.md")
     # process_file(info_md_path)
-    for day in range(18, 31):
-        dir_path = f"D:/Duty/BeltaScrapper/data/2011/{day:02d}.03.2011"
-        apply_to_all_files(dir_path, process_file)
+    # One pool for all days, so workers (and their spaCy model) are started only once
+    with create_pool(max_workers=5) as pool:
+        for day in range(18, 31):
+            dir_path = f"D:/Duty/BeltaScrapper/data/2011/{day:02d}.03.2011"
+            apply_to_all_files(dir_path, process_file, pool=pool)
     
     
     # load_from_list(os.path.join(script_dir, "both.txt"))
     # Cleanup
     neo.close()
+    processed_texts.close()
     # nebula.close()
\ No newline at end of file
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ProcessedTextsStore:
+    """
+    Remembers the content hash of every text already turned into a graph, with the file it came from,
+    so identical articles under other names can skip NER and the LLM.
+    """
+
+    def __init__(self, db_path: str = "processed_texts.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily and per process: a SQLite connection must not be shared with forked workers
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS processed_texts (
+                    hash TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL
+                )
+            ''')
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get_filename(self, text_hash: str) -> Optional[str]:
+        """Return the file the text was first processed from, or None if it is new."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT filename FROM processed_texts WHERE hash = ?", (text_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_processed(self, text_hash: str, filename: str):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR IGNORE INTO processed_texts (hash, filename) VALUES (?, ?)", (text_hash, filename)
+            )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._conn_pid = None
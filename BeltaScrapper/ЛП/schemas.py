@@ -1,14 +1,25 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
+# Shared by every model parsed from LLM output: unknown keys are dropped, strings are stripped.
+# Not frozen, because the entity normalizer renames entities in place.
+_LLM_MODEL_CONFIG = ConfigDict(extra="ignore", str_strip_whitespace=True, validate_assignment=False)
+
+# The labels the KG extraction prompt allows
+EntityLabel = Literal["Person", "Organization", "Country", "City", "Role", "Event", "Document", "Resource"]
+
 class Entity(BaseModel):
+    model_config = _LLM_MODEL_CONFIG
+
     name: str = Field(description="Unique identifier (e.g., 'Mikhail Kasyanov', 'Prime Minister').")
-    label: str = Field(description="Type: Person, Organization, Role, Country, Event.")
+    label: EntityLabel = Field(description="Type: Person, Organization, Country, City, Role, Event, Document, Resource.")
     # Specific fields for entity properties
     description: Optional[str] = Field(default=None, description="Time independant context of the entity (e.g., 'political background').")
     # Note: Descriptions should not  be stored in graph entities
 
 class Relationship(BaseModel):
+    model_config = _LLM_MODEL_CONFIG
+
     source: str = Field(description="Name of the source entity.")
     target: str = Field(description="Name of the target entity.")
     type: str = Field(description="Relationship type (e.g., HELD_POSITION, LOCATED_IN).")
@@ -21,5 +32,7 @@ class Relationship(BaseModel):
     date: str = Field(description="Specific date of the relationship (e.g., '2004-02-15')")
 
 class KnowledgeGraph(BaseModel):
+    model_config = _LLM_MODEL_CONFIG
+
     entities: List[Entity]
     relationships: List[Relationship]
@@ -1,15 +1,57 @@
 import os
+from itertools import chain
 from pathlib import Path
-from typing import Callable, Any
-from multiprocessing import Pool
+from typing import Callable, Any, Iterator, Optional, Tuple
+import multiprocessing
+from multiprocessing.pool import Pool
 from tqdm import tqdm
 
 
+def iter_files(folder_path: str) -> Iterator[str]:
+    """
+    Recursively yield the paths of all files under folder_path.
+
+    os.scandir reads the file type together with the directory entries, so unlike
+    Path.is_file() this doesn't stat every entry, and nothing is collected up front.
+    """
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path
+
+
+def create_pool(
+    max_workers: Optional[int] = 5,
+    initializer: Optional[Callable[..., Any]] = None,
+    initargs: Tuple = (),
+) -> Pool:
+    """
+    Create a worker pool, forking where the platform allows it.
+
+    Forked workers inherit everything the parent already loaded (e.g. the spaCy model)
+    copy-on-write instead of importing and loading it again. With spawn (Windows) each
+    worker still loads it once, so keep one pool alive for many apply_to_all_files calls.
+
+    Args:
+        max_workers (int, optional): Number of worker processes. If None, uses os.cpu_count().
+        initializer (Callable, optional): Called as initializer(*initargs) once in every worker.
+        initargs (tuple): Arguments for initializer.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return context.Pool(processes=max_workers, initializer=initializer, initargs=initargs)
+
+
 def apply_to_all_files(
     folder_path: str,
     func: Callable[[str], Any],
     max_workers: int = 5,
     chunksize: int = 1,
+    pool: Optional[Pool] = None,
 ) -> None:
     """
     Recursively apply a function to every file in a directory, in parallel, with a progress bar.
@@ -19,25 +61,33 @@ def apply_to_all_files(
         func (Callable[[str], Any]): Function to apply. It will be called as func(file_path).
         max_workers (int, optional): Number of worker processes. If None, uses os.cpu_count().
         chunksize (int): Number of files to send to each worker at once (for better performance).
+        pool (Pool, optional): Pool from create_pool() to run on; it is left open.
+            When omitted, a pool of max_workers is created for this call only.
     """
     root = Path(folder_path)
     if not root.exists():
         raise FileNotFoundError(f"Folder not found: {folder_path}")
 
-    # Collect all file paths first
-    file_paths = [str(p) for p in root.rglob("*") if p.is_file()]
+    # Files are discovered lazily: workers start while the walk is still going
+    file_paths = iter_files(folder_path)
+    first_path = next(file_paths, None)
 
-    if not file_paths:
+    if first_path is None:
         print(f"No files found in '{folder_path}'.")
         return
 
-    # Use multiprocessing.Pool with tqdm
-    with Pool(processes=max_workers) as pool:
-        list(
-            tqdm(
-                pool.imap(func, file_paths, chunksize=chunksize),
-                total=len(file_paths),
-                desc="Processing files",
-                unit="file",
-            )
-        )
+    if pool is None:
+        with create_pool(max_workers) as own_pool:
+            _run_on_pool(own_pool, func, chain([first_path], file_paths), chunksize)
+    else:
+        _run_on_pool(pool, func, chain([first_path], file_paths), chunksize)
+
+
+def _run_on_pool(pool: Pool, func: Callable[[str], Any], file_paths: Iterator[str], chunksize: int) -> None:
+    # tqdm over the results; unordered so one slow file doesn't hold back the rest
+    for _ in tqdm(
+        pool.imap_unordered(func, file_paths, chunksize=chunksize),
+        desc="Processing files",
+        unit="file",
+    ):
+        pass
@@ -1,4 +1,5 @@
 import os
+from string import Template
 
 from pydantic import BaseModel, Field
 from generator import Generator
@@ -10,19 +11,13 @@ class QueryAI(BaseModel):
 	prompt : str = Field(description="AI natural language query")
 	current_query : str = Field(description="Current Cypher query (user might want to edit it)")
 
-class Requester():
-    def __init__(self, generator : Generator, labels) -> None:
-        self.labels = labels
-        self.generator = generator
-
-    def generate_from_language(self, text:str, current_query: str) -> Query:
-        rel_schema = """
+# The prompt is split around the per-request parts; the schema section only changes with the labels
+_REL_SCHEMA = """
         "type": "RELATIONSHIP_TYPE", // in UPPER_SNAKE_CASE
     	"reasoning": "string data (contains some reasoning text (useful for search))"
       """
-        
-        
-        prompt=f"""
+
+_PROMPT_HEAD = """
     You are an expert Neo4j developer and data scientist. Your task is to translate natural language questions into valid, optimized Cypher queries based strictly on the schema provided below.
 
 	if a query is completely unrelated text, you might put an answer into query field like:
@@ -30,17 +25,19 @@ class Requester():
 
 	User might want to edit the query they have currently (But not necessary).
 	<current_query>
- 	{current_query}
+ 	"""
+
+_PROMPT_SCHEMA = Template("""
 	</current_query>
  
     ### 1. GRAPH SCHEMA
     **Available Node Labels & Properties:**
-    {self.labels}
+    $labels
     IMPORTANT nodes dont have properties and all the data stored mostly in relationships.
     EXAMPLE: a person might HOLD_POSITION of somethig, so the position name is stored in the relationship, not in the node.
     ---
     **Available Relationship attributes (example):**
-    {rel_schema}
+    $rel_schema
     ---
     ### 2. RULES & CONSTRAINTS
     - **all entity names are in lowercase in this database**
@@ -50,11 +47,32 @@ class Requester():
     - **Output:** Do not provide explanations or conversational filler. Output ONLY the Cypher query inside a markdown code block.
     - **Use `CONTAINS` for string searches instead of exact matches.**
     - **Always set limot for data retrieved. If user doesnt asks specificly try to make it not greater that 500 entries**
+    - **Return graph elements as maps, not as raw nodes/relationships:** nodes as `n {.*, _id: elementId(n), _labels: labels(n)}`, relationships as `r {.*, _id: elementId(r), _type: type(r), _src: elementId(startNode(r)), _tgt: elementId(endNode(r))}`. Return the nodes at both ends of every relationship too.
     ---
     ### 4. CURRENT REQUEST
     **Natural Language Query:**
-    {text}
+    """)
+
+_PROMPT_TAIL = """
     """
+
+class Requester():
+    def __init__(self, generator : Generator, labels) -> None:
+        self.labels = labels
+        self.generator = generator
+
+    @property
+    def labels(self):
+        return self._labels
+
+    @labels.setter
+    def labels(self, labels):
+        # Rebuild the static middle of the prompt once per label change, not per request
+        self._labels = labels
+        self._prompt_schema = _PROMPT_SCHEMA.substitute(labels=labels, rel_schema=_REL_SCHEMA)
+
+    def generate_from_language(self, text:str, current_query: str) -> Query:
+        prompt = "".join((_PROMPT_HEAD, current_query, self._prompt_schema, text, _PROMPT_TAIL))
         
         query = self.generator.generate_one_shot(
             pydantic_model=Query,
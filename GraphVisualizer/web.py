@@ -1,10 +1,15 @@
+import asyncio
 import os
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from neo4j import GraphDatabase, basic_auth
+from fastapi.responses import ORJSONResponse
+import orjson
+from neo4j import AsyncGraphDatabase, READ_ACCESS, RoutingControl, basic_auth
 from dotenv import load_dotenv
 from neo4j.graph import Node, Relationship, Path
+from neo4j.time import Date, DateTime, Duration, Time
 from generate_cypher import Query, Requester, QueryAI
 from dotenv import load_dotenv
 
@@ -18,20 +23,42 @@ USER = "neo4j"
 PASSWORD = "11111111"
 
 # 2. Database Connection Management
+# Pool sized for concurrent requests; a request waits at most 15s for a free connection
+NEO4J_POOL_SIZE = 50
+NEO4J_ACQUISITION_TIMEOUT = 15
+NEO4J_CONNECTION_LIFETIME = 3600
+
 driver = None
+requester = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Create driver
-    global driver
-    driver = GraphDatabase.driver(URI, auth=basic_auth(USER, PASSWORD))
+    global driver, requester
+    # Async driver: queries are awaited instead of blocking the event loop
+    driver = AsyncGraphDatabase.driver(
+        URI,
+        auth=basic_auth(USER, PASSWORD),
+        max_connection_pool_size=NEO4J_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+        max_connection_lifetime=NEO4J_CONNECTION_LIFETIME,
+    )
     print(f"Connected to Neo4j at {URI}")
+    # The requester needs the labels, so it is built once the driver is up
+    requester = Requester(
+        generator=Generator(client=GoogleGenAI(os.getenv("GEMINI_API_KEY"))),
+        labels=[]
+    )
+    try:
+        await get_cached_labels(force=True)
+    except Exception as e:
+        print(f"Could not load labels: {e}")
     yield
     # Shutdown: Close driver
     if driver:
-        driver.close()
+        await driver.close()
 
-app = FastAPI(lifespan=lifespan, debug=True)
+app = FastAPI(lifespan=lifespan, debug=True, default_response_class=ORJSONResponse)
 
 # 3. CORS Setup (Crucial for Sigma.js on localhost:3000 to talk to Python on localhost:8000)
 app.add_middleware(
@@ -43,41 +70,181 @@ app.add_middleware(
 )
 
 
-def get_all_labels():
-    # 2. Connect to the database
-    with GraphDatabase.driver(URI, auth=basic_auth(USER, PASSWORD)) as driver:
-        driver.verify_connectivity()
-        
-        # 3. Execute the Cypher query
-        # "CALL db.labels()" is the most efficient way to get all labels
-        records, summary, keys = driver.execute_query(
-            "CALL db.labels() YIELD label RETURN label ORDER BY label",
-            database_="neo4j",  # Change if using a different database name
-        )
+async def get_all_labels():
+    # Execute the Cypher query on the app's driver
+    # "CALL db.labels()" is the most efficient way to get all labels
+    records, summary, keys = await driver.execute_query( # type: ignore
+        "CALL db.labels() YIELD label RETURN label ORDER BY label",
+        database_="neo4j",  # Change if using a different database name
+        routing_=RoutingControl.READ,
+    )
+
+    # Extract labels from the result records
+    # Each 'record' is like a dictionary where the key is the column name ('label')
+    labels = [record["label"] for record in records]
+    print(f"Found {len(labels)} labels:")
+    print(labels)
+    return labels
+
+
+# Labels only change when the importer adds a new kind of entity, so they are
+# cached and reloaded at most every LABELS_TTL seconds (or via /api/refresh_labels)
+LABELS_TTL = 300
+_labels_lock = asyncio.Lock()
+_labels_loaded_at = None
+
+async def get_cached_labels(force: bool = False):
+    """Return the label list, reloading it into the requester when stale or forced."""
+    global _labels_loaded_at
+    async with _labels_lock:
+        now = time.monotonic()
+        if force or _labels_loaded_at is None or now - _labels_loaded_at > LABELS_TTL:
+            try:
+                requester.labels = await get_all_labels() # type: ignore
+            except Exception:
+                if force:
+                    raise
+                # Keep serving the previous labels; retry after another TTL
+                print("Could not reload labels, keeping the cached ones")
+            _labels_loaded_at = now
+        return requester.labels # type: ignore
+
+
+# neo4j.time values are not datetime subclasses; orjson hands them to this hook
+# and serializes the native values it returns in C.
+_TEMPORAL_CONVERTERS = {Date: Date.to_native, Time: Time.to_native, DateTime: DateTime.to_native, Duration: str}
+
+
+def _orjson_default(value):
+    convert = _TEMPORAL_CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    # Graph elements nested in lists/maps (e.g. RETURN collect(n), nodes(p)) are not packed by
+    # process_neo4j_results; send their properties, as jsonable_encoder did.
+    # isinstance: the driver builds a Relationship subclass per relationship type
+    if isinstance(value, (Node, Relationship)):
+        return dict(value)
+    if isinstance(value, Path):
+        return {"nodes": list(value.nodes), "relationships": list(value.relationships)}
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class GraphJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also serializes neo4j.time values and nested graph elements found in query results."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Packers record each element once: a node/relationship that repeats across
+# records is not converted again, and its table-cell string is reused from reprs.
+
+def _pack_node(node, nodes_map, edges_map, reprs):
+    element_id = node.element_id
+    if element_id in nodes_map:
+        return reprs[element_id]
+    nodes_map[element_id] = {
+        "id": element_id,
+        "labels": tuple(node.labels), # Convert frozenset to a tuple (serialized as a JSON array)
+        "properties": dict(node)
+    }
+    # For the table view, we might just want a string rep
+    text = reprs[element_id] = f"Node({element_id})"
+    return text
+
+
+def _pack_relationship(rel, nodes_map, edges_map, reprs):
+    element_id = rel.element_id
+    if element_id in edges_map:
+        return reprs[element_id]
+    edges_map[element_id] = {
+        "id": element_id,
+        "source": rel.start_node.element_id, # type: ignore
+        "target": rel.end_node.element_id, # type: ignore
+        "type": rel.type,
+        "properties": dict(rel)
+    }
+    text = reprs[element_id] = f"Rel({rel.type})"
+    return text
 
-        # 4. Extract labels from the result records
-        # Each 'record' is like a dictionary where the key is the column name ('label')
-        labels = [record["label"] for record in records]
-        print(f"Found {len(labels)} labels:")
-        print(labels)
-        return labels
 
+def _pack_path(path, nodes_map, edges_map, reprs):
+    # A container of Nodes and Rels; elements seen before short-circuit in their packers
+    for node in path.nodes:
+        _pack_node(node, nodes_map, edges_map, reprs)
+    for rel in path.relationships:
+        _pack_relationship(rel, nodes_map, edges_map, reprs)
+    return f"Path(len={len(path)})"
 
-requester = Requester(
-    generator=Generator(client=GoogleGenAI(os.getenv("GEMINI_API_KEY"))), 
-    labels=get_all_labels()
-)
+
+# Keys the generated queries add to map projections (see generate_cypher's prompt rules)
+_PROJECTION_KEYS = frozenset(("_id", "_labels", "_type", "_src", "_tgt"))
+
+
+def _pack_map(value, nodes_map, edges_map, reprs):
+    """
+    Pack a map projection: `n {.*, _id, _labels}` is a node, `r {.*, _id, _type, _src, _tgt}`
+    a relationship. The server already flattened them, so no driver objects are involved.
+    Any other map is plain table data.
+    """
+    element_id = value.get("_id")
+    if element_id is None:
+        return value
+    if element_id in reprs:
+        return reprs[element_id]
+
+    properties = {k: v for k, v in value.items() if k not in _PROJECTION_KEYS}
+    if "_src" in value:
+        edges_map[element_id] = {
+            "id": element_id,
+            "source": value["_src"],
+            "target": value.get("_tgt"),
+            "type": value.get("_type"),
+            "properties": properties
+        }
+        text = reprs[element_id] = f"Rel({value.get('_type')})"
+    else:
+        nodes_map[element_id] = {
+            "id": element_id,
+            "labels": value.get("_labels", ()),
+            "properties": properties
+        }
+        text = reprs[element_id] = f"Node({element_id})"
+    return text
+
+
+# Dispatch table keyed by exact type(value). Scalars map to None.
+_GRAPH_PACKERS = {dict: _pack_map, Node: _pack_node, Relationship: _pack_relationship, Path: _pack_path}
+
+
+def _packer_for(value_type):
+    """
+    Look up the packer for a value type.
+    The driver builds a Relationship subclass per relationship type, so unseen
+    types are resolved once through their MRO and memoized.
+    """
+    try:
+        return _GRAPH_PACKERS[value_type]
+    except KeyError:
+        packer = next(
+            (_GRAPH_PACKERS[base] for base in value_type.__mro__ if base in (dict, Node, Relationship, Path)),
+            None,
+        )
+        _GRAPH_PACKERS[value_type] = packer
+        return packer
 
 
 def process_neo4j_results(result):
     """
-    Parses a Neo4j Result object into a generic format for the frontend.
+    Parses Neo4j records into a generic format for the frontend.
     Deduplicates nodes and edges.
     """
     
     # Use dictionaries for deduplication (Key = Element ID)
     nodes_map = {}
     edges_map = {}
+    # Element ID -> table-cell string, so repeated elements skip the f-string
+    reprs = {}
     
     # List to hold non-graph tabular data
     table_data = []
@@ -87,57 +254,12 @@ def process_neo4j_results(result):
         
         # Iterate over every key-value pair in the row
         for key, value in record.items():
-            
-            # --- CHECK FOR GRAPH DATA ---
-            
-            # 1. Is it a Node?
-            if isinstance(value, Node):
-                nodes_map[value.element_id] = {
-                    "id": value.element_id,
-                    "labels": list(value.labels), # Convert frozenset to list
-                    "properties": dict(value)
-                }
-                # For the table view, we might just want a string rep
-                row_data[key] = f"Node({value.element_id})"
-
-            # 2. Is it a Relationship?
-            elif isinstance(value, Relationship):
-                edges_map[value.element_id] = {
-                    "id": value.element_id,
-                    "source": value.start_node.element_id, # type: ignore
-                    "target": value.end_node.element_id, # type: ignore
-                    "type": value.type,
-                    "properties": dict(value)
-                }
-                row_data[key] = f"Rel({value.type})"
-
-            # 3. Is it a Path? (A container of Nodes and Rels)
-            elif isinstance(value, Path):
-                for node in value.nodes:
-                    nodes_map[node.element_id] = {
-                        "id": node.element_id,
-                        "labels": list(node.labels),
-                        "properties": dict(node)
-                    }
-                for rel in value.relationships:
-                    edges_map[rel.element_id] = {
-                        "id": rel.element_id,
-                        "source": rel.start_node.element_id, # type: ignore
-                        "target": rel.end_node.element_id, # type: ignore
-                        "type": rel.type,
-                        "properties": dict(rel)
-                    }
-                row_data[key] = f"Path(len={len(value)})"
-
-            # 4. Is it a List? (Might contain Nodes/Rels)
-            elif isinstance(value, list):
-                # You might want to recursively check lists here 
-                # strictly for visualization extraction
-                row_data[key] = value
-
-            # --- OTHERWISE IT IS SCALAR DATA ---
+            packer = _packer_for(type(value))
+            if packer is not None:
+                # Graph data (map projection / Node / Relationship / Path)
+                row_data[key] = packer(value, nodes_map, edges_map, reprs)
             else:
-                # Strings, Ints, Maps, Dates
+                # Strings, Ints, Maps, Dates, Lists
                 row_data[key] = value
         
         table_data.append(row_data)
@@ -156,10 +278,9 @@ def process_neo4j_results(result):
 # We explicitly map your specific fields (reasoning, date, source_files) here.
 CYPHER_QUERY = """
     MATCH (n)-[r]->(m)
-    // Optional: Limit for performance if DB is huge
-    LIMIT 100
-
+    // Limit for performance if DB is huge; a parameter, so the plan is cached once for every limit
     WITH n, r, m
+    LIMIT $limit
     
     // 1. Pack Source & Target Nodes
     // We use "name" for the visual label because your insertion code uses "name" as the key.
@@ -198,7 +319,7 @@ CYPHER_QUERY = """
             // source_count: size(r.source_files),
             
             // Debugging info
-            created_at: toString(r.created_at)
+            created_at: r.created_at
         }
     }) as edges
 
@@ -213,25 +334,31 @@ CYPHER_QUERY = """
 
 
 
-def get_graph_data_tx(tx):
-    result = tx.run(CYPHER_QUERY)
-    record = result.single()
+# Default and maximum number of relationships returned by /api/graph
+GRAPH_DEFAULT_LIMIT = 100
+GRAPH_MAX_LIMIT = 5000
+
+async def get_graph_data_tx(tx, limit=GRAPH_DEFAULT_LIMIT):
+    result = await tx.run(CYPHER_QUERY, limit=limit)
+    record = await result.single()
     return record["graphData"] if record else {"nodes": [], "edges": []}
 
 
 @app.post("/api/query")
-def exec_query_and_parse(query: Query):
+async def exec_query_and_parse(query: Query):
     print(f"Executing {query.query}")
     if not driver:
         raise HTTPException(status_code=503, detail="Database connection failed")
     
     try:
-        # Execute query in a read transaction (Best Practice for Clusters/Performance)
-        with driver.session() as session:
-            result = session.run(query.query) # type: ignore
-            data = process_neo4j_results(result)
+        # User queries may write, so this session keeps the default (write) access mode
+        async with driver.session() as session:
+            result = await session.run(query.query) # type: ignore
+            records = [record async for record in result]
+            data = process_neo4j_results(records)
             # print(data)
-            return data
+            # Returning the response directly skips jsonable_encoder's Python walk
+            return GraphJSONResponse(data)
         
     except Exception as e:
         print(f"Error executing query: {e}")
@@ -271,31 +398,48 @@ def exec_query_and_parse(query: Query):
 
 #return results of predefined query 
 @app.get("/api/graph")
-async def get_graph():
+async def get_graph(limit: int = GRAPH_DEFAULT_LIMIT):
     if not driver:
         raise HTTPException(status_code=503, detail="Database connection failed")
+    if not 1 <= limit <= GRAPH_MAX_LIMIT:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {GRAPH_MAX_LIMIT}")
     
     try:
         # Execute query in a read transaction (Best Practice for Clusters/Performance)
-        with driver.session() as session:
-            data = session.execute_read(get_graph_data_tx)
+        async with driver.session(default_access_mode=READ_ACCESS) as session:
+            data = await session.execute_read(get_graph_data_tx, limit)
             print(f"Loaded nodes : {len(data["nodes"])}")
-            return data
+            return GraphJSONResponse(data)
     except Exception as e:
         print(f"Error executing query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/reques_query")
-def get_query(query: QueryAI):
+async def get_query(query: QueryAI):
     print(f"Imagining {query.prompt}")
     try:
-        return requester.generate_from_language(query.prompt, query.current_query)
+        await get_cached_labels()
+        # The LLM client is blocking, keep it off the event loop
+        return await asyncio.to_thread(
+            requester.generate_from_language, query.prompt, query.current_query # type: ignore
+        )
     except Exception as e:
         print(f"Error executing query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/refresh_labels")
+async def refresh_labels():
+    if not driver:
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    try:
+        return {"labels": await get_cached_labels(force=True)}
+    except Exception as e:
+        print(f"Error loading labels: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 if __name__ == "__main__":
     import uvicorn
     # Run with: python -m uvicorn web:app --host 127.0.0.1 --port 8000 --reload
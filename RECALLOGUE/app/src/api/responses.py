@@ -0,0 +1,50 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, List, Sequence, Type
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])  # type: ignore[valid-type]
+
+
+def schema_list_response(schema: Type[BaseModel], items: Sequence[Any]) -> Response:
+    """
+    JSON response for a list of already-built schema objects.
+
+    The services return validated schemas, so the list is dumped straight to JSON bytes by
+    pydantic-core. Returning a Response makes FastAPI skip re-validating every item against
+    the endpoint's response_model, which stays declared for the OpenAPI docs.
+    """
+    return Response(content=_list_adapter(schema).dump_json(items), media_type="application/json")
+
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110): W/ prefixes don't matter for If-None-Match
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
+
+
+def etag_response(request: Request, item: BaseModel) -> Response:
+    """
+    JSON response for a single schema object, with an ETag derived from its serialized body.
+
+    When the client's If-None-Match already names that ETag, a bodyless 304 is returned instead,
+    so a UI refetching an unchanged thread or message only pays for the revalidation.
+    """
+    body = item.model_dump_json().encode()
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    # Per-user data: browsers may keep it, but must revalidate before reusing it
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
\ No newline at end of file
@@ -33,11 +33,12 @@ def get_access_group(access_group_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[AccessGroupInDB])
-def get_access_groups(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_access_groups(skip: int = 0, limit: int = 100, after_id: int | None = None, db: Session = Depends(get_db)):
     """
     Get a list of access groups with pagination.
+    Pass `after_id` (the last group id of the previous page) instead of `skip` to page by keyset.
     """
-    return access_group_service.get_access_groups(db, skip=skip, limit=limit)
+    return access_group_service.get_access_groups(db, skip=skip, limit=limit, after_id=after_id)
 
 
 @router.put("/{access_group_id}", response_model=AccessGroupInDB)
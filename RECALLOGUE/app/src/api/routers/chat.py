@@ -1,15 +1,26 @@
-import json
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import AsyncIterator, List
 from datetime import datetime
 
+try:
+    # FastAPI >= 0.135: SSE framing, no-buffering headers and keepalive pings built in
+    from fastapi.sse import EventSourceResponse, ServerSentEvent
+except ImportError:
+    EventSourceResponse = None
+
 # --- Local Imports ---
 # Assumes a standard project structure
-from app.src.database.session import get_db
+from app.src.api.responses import etag_response, schema_list_response
+from app.src.config import settings
+from app.src.database import AsyncSessionLocal
+from app.src.database.session import get_db, get_async_db, release_db
 from app.src.auth.dependencies import get_current_user_from_cookie
-from app.src.schema.message_schemas import UserMessageRequest
+from app.src.schema.message_schemas import SystemResponse, UserMessageRequest
 from app.src.services import chat_service
 from app.src.services.chat_message import chat_message_service
 from app.src.services.thread import thread_service
@@ -27,20 +38,121 @@ router = APIRouter(
     dependencies=[Depends(get_current_user_from_cookie)]
 )
 
+# Used by the StreamingResponse fallback for FastAPI versions without fastapi.sse:
+# keep proxies (e.g. nginx) from caching or buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# SSE framing as bytes, so each event is one orjson call and two concatenations
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+NDJSON_NEWLINE = b"\n"
+
 # ==============================================================================
 # Endpoint Definitions
 # ==============================================================================
 
-@router.post("/{thread_id}/chat")
-async def chat_in_thread(message: UserMessageRequest, user : UserModel = Depends(get_current_user_from_cookie)):
+def _chunk_payload(chunk) -> bytes:
+    return orjson.dumps({'type': 'chunk', 'data': chunk.model_dump()})
+
+
+def _merge_chunks(chunks: List[SystemResponse]) -> SystemResponse:
+    """Merge consecutive response chunks into one: content is concatenated, lists extended, dicts updated."""
+    if len(chunks) == 1:
+        return chunks[0]
+
+    def extend(field: str):
+        values = [getattr(chunk, field) for chunk in chunks if getattr(chunk, field) is not None]
+        return [item for value in values for item in value] if values else None
+
+    other = None
+    for chunk in chunks:
+        if chunk.other is not None:
+            other = {**(other or {}), **chunk.other}
+
+    return SystemResponse(
+        content="".join(chunk.content for chunk in chunks),
+        sources=extend("sources"),
+        attachments=extend("attachments"),
+        other=other
+    )
+
+
+async def _coalesce_chunks(chunks: AsyncIterator[SystemResponse]) -> AsyncIterator[SystemResponse]:
+    """
+    Groups the service's chunks into batches of CHAT_STREAM_CHUNK_SIZE, so each SSE event (one JSON
+    encode, one write) carries several of them. A partial batch is flushed after CHAT_STREAM_FLUSH_MS,
+    so a slow generation is never held back for more than that.
+    """
+    size = settings.CHAT_STREAM_CHUNK_SIZE
+    if size <= 1:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    window = settings.CHAT_STREAM_FLUSH_MS / 1000
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    # The pending __anext__ runs as a task: a flush timeout must not cancel (and so close) the generator
+    pending = None
+    buffer: List[SystemResponse] = []
+    deadline = 0.0
     try:
-        def stream_generator():
-            for chunk in chat_service.message_request(message):
-                yield f"data: {json.dumps({'type': 'chunk', 'data': chunk}, ensure_ascii=False)}\n\n"
-        
-        return StreamingResponse(stream_generator(), media_type="text/event-stream")
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(deadline - loop.time(), 0) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                # Flush window elapsed; keep waiting on the same __anext__
+                yield _merge_chunks(buffer)
+                buffer = []
+                continue
+
+            task, pending = pending, None
+            try:
+                chunk = task.result()
+            except StopAsyncIteration:
+                break
+
+            if not buffer:
+                deadline = loop.time() + window
+            buffer.append(chunk)
+            if len(buffer) >= size:
+                yield _merge_chunks(buffer)
+                buffer = []
+
+        if buffer:
+            yield _merge_chunks(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+if EventSourceResponse is not None:
+    @router.post("/{thread_id}/chat", response_class=EventSourceResponse)
+    async def chat_in_thread(request: Request, message: UserMessageRequest):
+        # Authentication comes from the router-level dependency; the user itself isn't needed here.
+        # Its session would otherwise hold a pooled connection for the whole generation
+        await release_db(request)
+        # FastAPI frames each event and sends a keepalive ping while the model is slow to answer.
+        # raw_data keeps the orjson payload instead of FastAPI's jsonable_encoder + json.dumps
+        async for chunk in _coalesce_chunks(chat_service.message_request(message)):
+            yield ServerSentEvent(raw_data=_chunk_payload(chunk).decode())
+else:
+    @router.post("/{thread_id}/chat")
+    async def chat_in_thread(request: Request, message: UserMessageRequest):
+        # Authentication comes from the router-level dependency; the user itself isn't needed here.
+        # Its session would otherwise hold a pooled connection for the whole generation
+        await release_db(request)
+        try:
+            # Async generator: Starlette iterates it on the event loop instead of a threadpool
+            async def stream_generator():
+                async for chunk in _coalesce_chunks(chat_service.message_request(message)):
+                    yield SSE_PREFIX + _chunk_payload(chunk) + SSE_SUFFIX
+            
+            return StreamingResponse(stream_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
 
 @router.post("/messages", response_model=ChatMessage, status_code=status.HTTP_201_CREATED)
 def create_new_message(
@@ -51,139 +163,179 @@ def create_new_message(
     """
     Create a new chat message in a thread.
     """
-    # First, verify the thread exists and belongs to the current user
-    thread = thread_service.get_by_id(db, thread_id=message_in.thread_id)
-    if not thread:
+    # First, verify the thread exists and belongs to the current user (one query)
+    if not thread_service.verify_thread_ownership(db, thread_id=message_in.thread_id, user_id=current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Thread not found"
         )
 
-    if thread.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You are not authorized to add messages to this thread."
-        )
-
     # Create the message
     return chat_message_service.create_message(db=db, thread_id=message_in.thread_id, message=message_in)
 
 
 @router.get("/messages/{message_id}", response_model=ChatMessage)
-def get_single_message(
+async def get_single_message(
+    request: Request,
     message_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie)
 ):
     """
     Retrieve a specific message by its ID.
     A user can only retrieve a message from a thread that they own.
+    Supports conditional requests: send the ETag back in If-None-Match to get a 304 when unchanged.
     """
-    message = chat_message_service.get_message(db, message_id=message_id)
+    # One query checks existence and thread ownership; other users' messages are "not found"
+    message = await chat_message_service.get_owned_message_async(db, message_id=message_id, user_id=current_user.id)
 
     if not message:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
 
-    # Check thread ownership using thread service
-    if not thread_service.verify_thread_ownership(db, thread_id=message.thread_id, user_id=current_user.id):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this message")
-
-    return message
+    return etag_response(request, message)
 
 
 @router.get("/threads/{thread_id}/messages", response_model=List[ChatMessage])
-def get_messages_by_thread(
+async def get_messages_by_thread(
     thread_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    before_id: int | None = None,
+    after_id: int | None = None
 ):
     """
     Retrieve all messages for a specific thread.
     A user can only retrieve messages from threads that they own.
+    Pass `before_id` (the oldest message id already loaded) to get the previous page,
+    or `after_id` (the newest one) to get the next.
     """
-    # First verify the thread exists and is owned by the user
-    if not thread_service.verify_thread_ownership(db, thread_id=thread_id, user_id=current_user.id):
+    # Ownership is checked in the same query that lists the messages
+    messages = await chat_message_service.list_for_owned_thread_async(
+        db, user_id=current_user.id, thread_id=thread_id, skip=skip, limit=limit,
+        before_id=before_id, after_id=after_id
+    )
+    if messages is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
 
-    # Get messages from the thread
-    return chat_message_service.get_messages_by_thread(db, thread_id=thread_id, skip=skip, limit=limit)
+    return schema_list_response(ChatMessage, messages)
+
+
+@router.get("/threads/{thread_id}/messages/stream")
+async def stream_messages_by_thread(
+    thread_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_from_cookie),
+    role: str | None = None,
+    skip: int = 0,
+    limit: int | None = None
+):
+    """
+    Stream a thread's messages as newline-delimited JSON (one ChatMessage per line), oldest first.
+    Rows are sent as they are read from the database, so memory use and time to first byte don't
+    grow with the size of the history. A user can only stream messages from threads that they own.
+    """
+    if not await thread_service.get_owned_by_user_async(db, thread_id=thread_id, user_id=current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
+    user_id = current_user.id
+
+    async def ndjson_generator():
+        # The response outlives the endpoint call, so the stream reads through a session of its own
+        async with AsyncSessionLocal() as stream_db:
+            async for message in chat_message_service.stream_for_owned_thread_async(
+                stream_db, user_id=user_id, thread_id=thread_id, role=role, skip=skip, limit=limit
+            ):
+                yield orjson.dumps(message.model_dump()) + NDJSON_NEWLINE
+
+    return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
 
 
 @router.get("/threads/{thread_id}/messages/role/{role}", response_model=List[ChatMessage])
-def get_messages_by_thread_and_role(
+async def get_messages_by_thread_and_role(
     thread_id: int,
     role: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    before_id: int | None = None,
+    after_id: int | None = None
 ):
     """
     Retrieve messages filtered by role within a specific thread.
     A user can only retrieve messages from threads that they own.
     """
-    # First verify the thread exists and is owned by the user
-    if not thread_service.verify_thread_ownership(db, thread_id=thread_id, user_id=current_user.id):
+    # Ownership is checked in the same query that lists the messages
+    messages = await chat_message_service.list_for_owned_thread_async(
+        db, user_id=current_user.id, thread_id=thread_id, role=role, skip=skip, limit=limit,
+        before_id=before_id, after_id=after_id
+    )
+    if messages is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
 
-    # Get messages with the specified role from the thread
-    return chat_message_service.get_messages_by_role(db, thread_id=thread_id, role=role, skip=skip, limit=limit)
+    return schema_list_response(ChatMessage, messages)
 
 
 @router.get("/threads/{thread_id}/messages/search", response_model=List[ChatMessage])
-def get_messages_with_filters(
+async def get_messages_with_filters(
     thread_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie),
     role: str | None = None,
     search_content: str | None = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    before_id: int | None = None,
+    after_id: int | None = None
 ):
     """
     Retrieve messages with optional filters for role and content within a specific thread.
     A user can only retrieve messages from threads that they own.
     """
-    # First verify the thread exists and is owned by the user
-    if not thread_service.verify_thread_ownership(db, thread_id=thread_id, user_id=current_user.id):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
-
-    # Get messages with filters
-    return chat_message_service.get_messages_with_filters(
+    # Ownership is checked in the same query that lists the messages
+    messages = await chat_message_service.list_for_owned_thread_async(
         db,
+        user_id=current_user.id,
         thread_id=thread_id,
         role=role,
         search_content=search_content,
         skip=skip,
-        limit=limit
+        limit=limit,
+        before_id=before_id,
+        after_id=after_id
     )
+    if messages is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
+
+    return schema_list_response(ChatMessage, messages)
 
 
 @router.get("/threads/{thread_id}/messages/time_range", response_model=List[ChatMessage])
-def get_messages_by_time_range(
+async def get_messages_by_time_range(
     thread_id: int,
     start_time: datetime,
     end_time: datetime,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie)
 ):
     """
     Retrieve messages within a specific time range for a thread.
     A user can only retrieve messages from threads that they own.
     """
-    # First verify the thread exists and is owned by the user
-    if not thread_service.verify_thread_ownership(db, thread_id=thread_id, user_id=current_user.id):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
-
-    # Get messages within the time range
-    return chat_message_service.get_messages_by_time_range(
+    # Ownership is checked in the same query that lists the messages
+    messages = await chat_message_service.list_for_owned_thread_async(
         db,
+        user_id=current_user.id,
         thread_id=thread_id,
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        limit=None
     )
+    if messages is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
+
+    return schema_list_response(ChatMessage, messages)
 
 
 @router.put("/messages/{message_id}", response_model=ChatMessage)
@@ -197,15 +349,11 @@ def update_existing_message(
     Update the properties of an existing message (e.g., its content).
     A user can only update a message from a thread that they own.
     """
-    # First, get the message to check if it exists
-    existing_message = chat_message_service.get_message(db, message_id=message_id)
+    # First, check the message exists and belongs to one of the user's threads (one query)
+    existing_message = chat_message_service.get_owned_message(db, message_id=message_id, user_id=current_user.id)
     if not existing_message:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
 
-    # Check thread ownership using thread service
-    if not thread_service.verify_thread_ownership(db, thread_id=existing_message.thread_id, user_id=current_user.id):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this message")
-
     # Update the message
     updated_message = chat_message_service.update_message(db, message_id=message_id, message_update=message_in)
     if not updated_message:
@@ -225,15 +373,11 @@ def delete_message_by_id(
     A user can only delete a message from a thread that they own.
     Returns the data of the deleted message as confirmation.
     """
-    # First, get the message to check if it exists
-    existing_message = chat_message_service.get_message(db, message_id=message_id)
+    # First, check the message exists and belongs to one of the user's threads (one query)
+    existing_message = chat_message_service.get_owned_message(db, message_id=message_id, user_id=current_user.id)
     if not existing_message:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
 
-    # Check thread ownership using thread service
-    if not thread_service.verify_thread_ownership(db, thread_id=existing_message.thread_id, user_id=current_user.id):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this message")
-
     # Delete the message
     success = chat_message_service.delete_message(db, message_id=message_id)
     if not success:
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
 # --- Local Imports ---
 # Assumes a standard project structure
-from app.src.database.session import get_db
+from app.src.api.responses import etag_response, schema_list_response
+from app.src.database.session import get_db, get_async_db
 from app.src.auth.dependencies import get_current_user_from_cookie
 from app.src.services.thread import thread_service
 from app.src.schema import Thread, ThreadCreate, ThreadUpdate
@@ -46,24 +48,33 @@ def create_new_thread(
 
 
 @router.get("/", response_model=List[Thread])
-def get_user_threads(
-    db: Session = Depends(get_db),
+async def get_user_threads(
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    include_messages: bool = False,
+    after_id: int | None = None
 ):
     """
     Retrieve all threads owned by the currently authenticated user.
+    Use the `include_messages` query parameter to embed each thread's messages.
+    Pass `after_id` (the last thread already loaded) to get the next page.
     """
     # Correct implementation requires fetching by user ID
-    return thread_service.get_by_user_id(db, user_id=current_user.id, skip=skip, limit=limit) # type: ignore
+    threads = await thread_service.get_by_user_id_async(
+        db, user_id=current_user.id, skip=skip, limit=limit, include_messages=include_messages, # type: ignore
+        after_id=after_id
+    )
+    return schema_list_response(Thread, threads)
     
 
 @router.get("/{thread_id}", response_model=Thread)
-def get_single_thread(
+async def get_single_thread(
+    request: Request,
     thread_id: int,
     include_messages: bool = False,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user_from_cookie)
 ):
     """
@@ -72,17 +83,18 @@ def get_single_thread(
     - A user can only retrieve a thread that they own.
     - Use the `include_messages` query parameter to optionally embed all
       chat messages associated with this thread.
+    - Supports conditional requests: send the ETag back in If-None-Match to get
+      a 304 when the thread (and its messages, if included) hasn't changed.
     """
-    thread = thread_service.get_by_id(db, thread_id=thread_id, include_messages=include_messages)
+    # One query checks existence and ownership; other users' threads are "not found"
+    thread = await thread_service.get_owned_by_user_async(
+        db, thread_id=thread_id, user_id=current_user.id, include_messages=include_messages
+    )
 
     if not thread:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
 
-    # Security: Ensure the user owns the thread they are trying to access
-    if thread.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this thread")
-        
-    return thread
+    return etag_response(request, thread)
 
 
 @router.put("/{thread_id}", response_model=Thread)
@@ -96,13 +108,9 @@ def update_existing_thread(
     Update the properties of an existing thread (e.g., its name).
     A user can only update a thread that they own.
     """
-    # First, verify the thread exists and the user owns it
-    existing_thread = thread_service.get_by_id(db, thread_id=thread_id)
-    if not existing_thread:
+    # First, verify the thread exists and the user owns it (one query; other users' threads are "not found")
+    if not thread_service.get_owned_by_user(db, thread_id=thread_id, user_id=current_user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
-    
-    if existing_thread.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to update this thread")
 
     # If checks pass, proceed with the update
     updated_thread = thread_service.update(db, thread_id=thread_id, thread_in=thread_in)
@@ -122,12 +130,8 @@ def delete_thread_by_id(
     Returns the data of the deleted thread as confirmation.
     """
     # Verify the thread exists and the user owns it before attempting to delete
-    thread_to_delete = thread_service.get_by_id(db, thread_id=thread_id)
-    if not thread_to_delete:
+    if not thread_service.get_owned_by_user(db, thread_id=thread_id, user_id=current_user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
-        
-    if thread_to_delete.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this thread")
 
     # The service layer handles the actual deletion and raises a 404 if it's already gone
     deleted_thread = thread_service.delete(db, thread_id=thread_id)
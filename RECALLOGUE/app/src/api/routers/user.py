@@ -34,11 +34,12 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[UserInDB])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_users(skip: int = 0, limit: int = 100, after_id: int | None = None, db: Session = Depends(get_db)):
     """
     Get a list of users with pagination.
+    Pass `after_id` (the last user id of the previous page) instead of `skip` to page by keyset.
     """
-    return user_service.get_users(db, skip=skip, limit=limit)
+    return user_service.get_users(db, skip=skip, limit=limit, after_id=after_id)
 
 
 @router.put("/{user_id}", response_model=UserInDB)
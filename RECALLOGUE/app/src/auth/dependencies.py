@@ -1,18 +1,32 @@
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from jwt import InvalidTokenError
 
 from app.src.database.session import get_db
 from app.src.models.user import User
-from app.src.config import settings
 from app.src.schema.token import TokenData
 from app.src.repositories import user_repo
+from app.src.utils.security import decode_access_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def get_current_user_from_headers(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def _decode_token(request: Request, token: str) -> dict:
+    """
+    Decodes the JWT once per request and keeps the claims on `request.state`,
+    so every dependency that needs them in the same request reuses the result.
+    Raises InvalidTokenError if the token is invalid.
+    """
+    claims = getattr(request.state, "jwt_claims", None)
+    if claims is None or getattr(request.state, "jwt_token", None) != token:
+        claims = decode_access_token(token)
+        request.state.jwt_token = token
+        request.state.jwt_claims = claims
+    return claims
+
+
+def get_current_user_from_headers(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -20,18 +34,17 @@ def get_current_user_from_headers(token: str = Depends(oauth2_scheme), db: Sessi
     )
     try:
         # Decode the token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_token(request, token)
         # The user's ID is stored in the "sub" (subject) field of the token
         username: str = payload.get("sub") # type: ignore
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
     
     # Get the user from the database
-    user = user_repo.get_by_username(db, username)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = user_repo.get_by_username(db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
@@ -44,6 +57,7 @@ def get_token_from_cookie(access_token: str | None = Cookie(None)) -> str | None
     return access_token
 
 def get_current_user_from_cookie(
+    request: Request,
     token: str | None = Depends(get_token_from_cookie), 
     db: Session = Depends(get_db)
 ) -> User:
@@ -52,7 +66,7 @@ def get_current_user_from_cookie(
     
     1. It depends on `get_token_from_cookie` to get the raw token.
     2. If the token is missing, it raises a 401 Unauthorized error.
-    3. It decodes and validates the token.
+    3. It decodes and validates the token (once per request, see `_decode_token`).
     4. If the token is invalid, it raises a 401 error.
     5. It fetches the user from the database.
     6. If the user doesn't exist, it raises a 401 error.
@@ -69,17 +83,23 @@ def get_current_user_from_cookie(
         detail="Could not validate credentials",
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_token(request, token)
         username: str = payload.get("sub") # type: ignore
         if username is None:
             raise credentials_exception
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
-    
+
+    # Reuse the user already loaded for this request by another dependency node
+    user = getattr(request.state, "current_user", None)
+    if user is not None and user.username == username:
+        return user
+
     user = user_repo.get_by_username(db, username=username) 
     if user is None:
         raise credentials_exception
-        
+
+    request.state.current_user = user
     return user
 
 
@@ -7,6 +7,21 @@ load_dotenv()
 class Settings:
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./recallogue.db")
+    # Connection pool: every request holds a session (and a connection) for its whole duration.
+    # pool size + overflow should cover THREADPOOL_SIZE, or sync endpoints queue up on pool_timeout
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "25"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "25"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Recycle before common server/proxy idle timeouts close connections on their side
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Separate pool for the async engine (read endpoints on the event loop). It doesn't depend on
+    # THREADPOOL_SIZE, so it stays small. Per worker process the database may see up to
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW + DB_ASYNC_POOL_SIZE + DB_ASYNC_MAX_OVERFLOW connections (70 by default);
+    # keep that times the number of workers under the server's max_connections (100 on a default Postgres)
+    DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+    DB_ASYNC_MAX_OVERFLOW: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "10"))
+    # Rows per INSERT statement when SQLAlchemy batches an executemany (insertmanyvalues)
+    DB_INSERT_PAGE_SIZE: int = int(os.getenv("DB_INSERT_PAGE_SIZE", "1000"))
     
     # Security settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-this-in-production")
@@ -15,6 +30,11 @@ class Settings:
     
     # Password hashing settings
     HASHING_ROUNDS: int = int(os.getenv("HASHING_ROUNDS", "12"))
+    # When set, HASHING_ROUNDS is recalibrated at startup so one hash takes about this long on the host
+    HASHING_TARGET_MS: int = int(os.getenv("HASHING_TARGET_MS", "0"))
+
+    # Worker threads for sync endpoints (bcrypt on login runs there; it releases the GIL while hashing)
+    THREADPOOL_SIZE: int = int(os.getenv("THREADPOOL_SIZE", "40"))
     
     # Server settings
     SERVER_HOST: str = os.getenv("SERVER_HOST", "127.0.0.1")
@@ -25,5 +45,10 @@ class Settings:
     MODEL_ROLE = os.getenv("MODEL_ROLE", "model")
     LLAMACPP_CHAT_BASE = os.getenv("LLAMACPP_CHAT_BASE", "http://localhost:8080")
 
+    # Chat streaming: up to this many response chunks are merged into one SSE event...
+    CHAT_STREAM_CHUNK_SIZE: int = int(os.getenv("CHAT_STREAM_CHUNK_SIZE", "3"))
+    # ...but a partial batch is sent once its first chunk has waited this long
+    CHAT_STREAM_FLUSH_MS: int = int(os.getenv("CHAT_STREAM_FLUSH_MS", "20"))
+
 # Create a global instance of settings
 settings = Settings()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .base import engine, SessionLocal, Base
+from .base import engine, SessionLocal, async_engine, AsyncSessionLocal, Base
 from .init_db import init_db
 
-__all__ = ["engine", "SessionLocal", "Base", "init_db"]
\ No newline at end of file
+__all__ = ["engine", "SessionLocal", "async_engine", "AsyncSessionLocal", "Base", "init_db"]
\ No newline at end of file
@@ -1,15 +1,59 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.src.config import settings
 
 # Get database URL from environment variables
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+
+def _pool_args(url: str, pool_size: int, max_overflow: int) -> dict:
+    # In-memory SQLite is served by a single-connection pool that takes no sizing options
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") == "sqlite:"):
+        return {}
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # Replace connections the server dropped instead of failing the request
+        "pool_pre_ping": True,
+    }
+
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
+    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {},
+    insertmanyvalues_page_size=settings.DB_INSERT_PAGE_SIZE,
+    **_pool_args(SQLALCHEMY_DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+)
+
+# Objects stay loaded after commit: a create doesn't need a second SELECT to read back what it just wrote
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def _async_url(url: str) -> URL:
+    # Same database through an asyncio driver: asyncpg for Postgres, aiosqlite for SQLite
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    drivers = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+    if backend not in drivers:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=f"{backend}+{drivers[backend]}")
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = _async_url(SQLALCHEMY_DATABASE_URL)
+
+# Used by the read-only endpoints, which run as coroutines on the event loop instead of in the threadpool
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    insertmanyvalues_page_size=settings.DB_INSERT_PAGE_SIZE,
+    # Its own, smaller pool: the sync sizing only exists to cover the endpoint threadpool
+    **_pool_args(SQLALCHEMY_DATABASE_URL, settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW)
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay readable after the session ends: the endpoints convert them to schemas afterwards
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
\ No newline at end of file
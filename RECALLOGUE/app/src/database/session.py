@@ -1,10 +1,58 @@
-from typing import Generator
-from .base import SessionLocal
+from typing import AsyncGenerator
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .base import SessionLocal, AsyncSessionLocal
 
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
+class DBSessionMiddleware:
+    """
+    Owns the per-request Session: `get_db` opens it on first use and stores it on `request.state.db`,
+    this middleware closes it once the response has been sent. Plain ASGI, so streamed responses
+    pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Shared by reference with every child scope, so the endpoint's request.state lands here
+        state = scope.setdefault("state", {})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            db = state.pop("db", None)
+            if db is not None:
+                # Closing may roll back on the server; keep that round trip off the event loop
+                await run_in_threadpool(db.close)
+
+
+async def get_db(request: Request):
+    """
+    The request's Session, opened on first use and closed by DBSessionMiddleware.
+    A coroutine, so resolving it doesn't cost a threadpool round trip per request.
+    """
+    db = getattr(request.state, "db", None)
+    if db is None:
+        db = request.state.db = SessionLocal()
+    return db
+
+
+async def release_db(request: Request):
+    """
+    Closes the request's Session now instead of after the response, returning its connection to the pool.
+    For long responses (e.g. chat streams) that no longer need the database; a later `get_db` opens a new one.
+    """
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        del request.state.db
+        await run_in_threadpool(db.close)
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
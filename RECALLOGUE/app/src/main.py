@@ -1,6 +1,10 @@
+from anyio import to_thread
 from fastapi import FastAPI
+from app.src.config import settings
 from app.src.database import init_db, engine
+from app.src.database.session import DBSessionMiddleware
 from app.src.api.routers import dev, login, threads, user, access_group, chat
+from app.src.utils.security import calibrate_hashing_rounds
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="Recallogue")
@@ -16,6 +20,9 @@ sub_app.include_router(dev.router)
 sub_app.include_router(threads.router)
 sub_app.include_router(chat.router)
 
+# One Session per request, closed after the response is sent
+sub_app.add_middleware(DBSessionMiddleware)
+
 # Mount the sub-application with the global prefix "/api/v1"
 app.mount("/api/v1", sub_app)
 
@@ -31,4 +38,14 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup():
     # Initialize the database tables
-    init_db(engine)
\ No newline at end of file
+    init_db(engine)
+
+
+@app.on_event("startup")
+async def configure_workers():
+    # Sync endpoints (login's bcrypt, the ORM writes) share this pool; keep it bounded
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+
+    if settings.HASHING_TARGET_MS:
+        # Only affects new hashes: existing ones carry their own cost and still verify
+        settings.HASHING_ROUNDS = calibrate_hashing_rounds(settings.HASHING_TARGET_MS)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import DDL, Integer, String, DateTime, Text, JSON, ForeignKey, Index, event
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.src.database.base import Base
@@ -16,4 +16,23 @@ class ChatMessage(Base):
     sources: Mapped[list | None] = mapped_column(JSON)  # Store as JSON array
     links: Mapped[list | None] = mapped_column(JSON)  # Store as JSON array
     message_metadata: Mapped[dict | None] = mapped_column(JSON)  # Store as JSON object (renamed from 'metadata' to avoid SQLAlchemy conflict)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
\ No newline at end of file
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Serves thread lookups and keyset pagination (WHERE thread_id = ? AND id < ? ORDER BY id DESC)
+Index("idx_msg_thread_id_desc", ChatMessage.thread_id, ChatMessage.id.desc())
+# Time-range lookups and the default chronological listing of a thread
+Index("ix_msg_thread_ts", ChatMessage.thread_id, ChatMessage.timestamp)
+# Role filter within a thread
+Index("ix_msg_thread_role", ChatMessage.thread_id, ChatMessage.role)
+
+# Full-text search over message content (Postgres only; other backends keep LIKE in the repository).
+# An expression index, so the table itself stays portable for SQLite.
+event.listen(
+    ChatMessage.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS idx_msg_content_tsv "
+        "ON chat_messages USING gin (to_tsvector('simple', content))"
+    ).execute_if(dialect="postgresql"),
+)
\ No newline at end of file
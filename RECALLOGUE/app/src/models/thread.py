@@ -14,4 +14,9 @@ class Thread(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     allowed_sources: Mapped[List[str]] = mapped_column(JSON, nullable=True)
     user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
-    owner: Mapped["User"] = relationship("User", back_populates="threads") # type: ignore
\ No newline at end of file
+    owner: Mapped["User"] = relationship("User", back_populates="threads") # type: ignore
+    # Read-only and never lazy-loaded: queries opt in with selectinload (see thread_repo.get_by_user_id),
+    # anything else touching it raises instead of quietly issuing one SELECT per thread
+    chat_messages: Mapped[List["ChatMessage"]] = relationship( # type: ignore
+        "ChatMessage", viewonly=True, lazy="raise", order_by="ChatMessage.timestamp"
+    )
\ No newline at end of file
@@ -1,5 +1,7 @@
 from typing import Any, Generic, List, Optional, Type, TypeVar, Dict
 from pydantic import BaseModel
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.declarative import as_declarative
 
@@ -8,7 +10,9 @@ from sqlalchemy.ext.declarative import as_declarative
 @as_declarative()
 class Base:
     def as_dict(self) -> Dict[str, Any]:
-       return {c.name: getattr(self, c.name) for c in self.__table__.columns} # type: ignore
+       # Read the loaded state directly instead of going through each instrumented attribute
+       state = self.__dict__
+       return {key: state[key] for key in self.__table__.columns.keys() if key in state} # type: ignore
 
 
 # Define custom types for our generic repository.
@@ -33,48 +37,78 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         """
         Get a single object by its primary key ID.
+        Served from the session's identity map when the object is already loaded.
         """
-        return db.query(self.model).filter(self.model.id == id).first() # type: ignore
+        return db.get(self.model, id)
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """
+        Same as `get`, on an AsyncSession.
+        """
+        return await db.get(self.model, id)
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
     ) -> List[ModelType]:
         """
         Get multiple objects with pagination.
+        Pass `after_id` (the last id of the previous page) instead of `skip` to seek straight to
+        the next page on the primary key index rather than reading and discarding `skip` rows.
         """
-        return db.query(self.model).order_by(self.model.id).offset(skip).limit(limit).all() # type: ignore
+        stmt = select(self.model).order_by(self.model.id).limit(limit) # type: ignore
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id) # type: ignore
+        else:
+            stmt = stmt.offset(skip)
+        return list(db.scalars(stmt))
 
     # --- CREATE, UPDATE, DELETE METHODS ---
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """
         Create a new object in the database.
+        The row comes back from INSERT ... RETURNING, so there is no follow-up SELECT to refresh it.
         """
         # Convert Pydantic schema to a dictionary
         obj_in_data = obj_in.model_dump()
-        # Create a SQLAlchemy model instance
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
+        stmt = insert(self.model).values(**obj_in_data).returning(self.model)
+        db_obj = db.scalars(stmt).one()
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
+    def create_many(
+        self, db: Session, *, objs_in: List[CreateSchemaType], batch_size: int = 50
+    ) -> List[ModelType]:
+        """
+        Create many objects with one commit.
+        Each batch of `batch_size` rows is a single INSERT ... RETURNING (SQLAlchemy's
+        insertmanyvalues), instead of one INSERT and one refresh SELECT per object.
+        """
+        rows = [obj_in.model_dump() for obj_in in objs_in]
+        # sort_by_parameter_order: objects come back in the order of objs_in
+        stmt = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+
+        db_objs: List[ModelType] = []
+        for start in range(0, len(rows), batch_size):
+            db_objs.extend(db.scalars(stmt, rows[start:start + batch_size]))
+        db.commit()
+        return db_objs
+
     def update(
         self, db: Session, *, db_obj: ModelType, obj_in: UpdateSchemaType
     ) -> ModelType:
         """
         Update an existing database object.
         """
-        # Convert the existing DB object to a dictionary
-        obj_data = db_obj.as_dict()
         # Get the update data from the input schema
         # `exclude_unset=True` ensures we only update the fields that were actually provided
         update_data = obj_in.model_dump(exclude_unset=True)
-        
-        # Overwrite the old values with the new ones
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        columns = self.model.__table__.columns # type: ignore
+
+        # Overwrite the old values with the new ones; the object's current state isn't needed for that
+        for field, value in update_data.items():
+            if field in columns:
+                setattr(db_obj, field, value)
                 
         db.add(db_obj)
         db.commit()
@@ -1,54 +1,196 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.src.models import ChatMessage
+from sqlalchemy import Row, and_, or_, func, literal_column, select
+from app.src.models import ChatMessage, Thread
 from app.src.schema import ChatMessage as ChatMessageSchema, ChatMessageUpdate
 from app.src.repositories.base import BaseRepository
 
+# Text search configuration; must match the expression of the idx_msg_content_tsv GIN index
+# (a literal, not a bound parameter, so the planner can match the query to the index)
+_TS_CONFIG = literal_column("'simple'")
+
+# The owned-thread listings only feed response schemas, so they select the columns as plain rows:
+# no identity map bookkeeping or instrumented attributes per message. Rows expose the columns as
+# attributes, so ChatMessage.from_orm() accepts them the same as model instances.
+_MESSAGE_COLUMNS = tuple(ChatMessage.__table__.columns)
+
 
 class ChatMessageRepository(BaseRepository[ChatMessage, ChatMessageSchema, ChatMessageUpdate]):
+    @staticmethod
+    def _paginate(stmt, skip: int, limit: Optional[int], before_id: Optional[int],
+                  after_id: Optional[int] = None):
+        """
+        Without `before_id`/`after_id`: offset pagination in chronological order.
+        With `before_id`: keyset pagination - the `limit` messages right before that message,
+        read backwards along the (thread_id, id) index, so the cost of a page doesn't grow
+        with how deep into the thread it is.
+        With `after_id`: the same, forwards - the `limit` messages right after that message.
+        Pass the rows through `_page_rows` to get them oldest first in all cases.
+        """
+        if after_id is not None:
+            stmt = stmt.where(ChatMessage.id > after_id)
+        if before_id is not None:
+            return stmt.where(ChatMessage.id < before_id).order_by(ChatMessage.id.desc()).limit(limit)
+        if after_id is not None:
+            return stmt.order_by(ChatMessage.id.asc()).limit(limit)
+        return stmt.order_by(ChatMessage.timestamp.asc()).offset(skip).limit(limit)
+
+    @staticmethod
+    def _page_rows(rows, before_id: Optional[int]) -> List[Any]:
+        messages = list(rows)
+        if before_id is not None:
+            messages.reverse()
+        return messages
+
+    @staticmethod
+    def _search_content(dialect_name: str, stmt, search_content: str):
+        if dialect_name == "postgresql":
+            # Full-text search on the GIN index instead of a full scan with LIKE '%...%'
+            return stmt.where(
+                func.to_tsvector(_TS_CONFIG, ChatMessage.content).op("@@")(
+                    func.websearch_to_tsquery(_TS_CONFIG, search_content)
+                )
+            )
+        return stmt.where(ChatMessage.content.contains(search_content))
+
     def get_messages_by_thread(self, db: Session, thread_id: int, 
-                              skip: int = 0, limit: int = 100) -> List[ChatMessage]:
-        return db.query(ChatMessage).filter(
-            ChatMessage.thread_id == thread_id
-        ).order_by(ChatMessage.timestamp.asc()).offset(skip).limit(limit).all()
+                              skip: int = 0, limit: int = 100,
+                              before_id: Optional[int] = None,
+                              after_id: Optional[int] = None) -> List[ChatMessage]:
+        stmt = select(ChatMessage).where(ChatMessage.thread_id == thread_id)
+        return self._page_rows(db.scalars(self._paginate(stmt, skip, limit, before_id, after_id)), before_id)
 
     def get_messages_by_role(self, db: Session, thread_id: int, 
-                            role: str, skip: int = 0, limit: int = 100) -> List[ChatMessage]:
-        return db.query(ChatMessage).filter(
+                            role: str, skip: int = 0, limit: int = 100,
+                            before_id: Optional[int] = None,
+                            after_id: Optional[int] = None) -> List[ChatMessage]:
+        stmt = select(ChatMessage).where(
             and_(
                 ChatMessage.thread_id == thread_id,
                 ChatMessage.role == role
             )
-        ).order_by(ChatMessage.timestamp.asc()).offset(skip).limit(limit).all()
+        )
+        return self._page_rows(db.scalars(self._paginate(stmt, skip, limit, before_id, after_id)), before_id)
 
     def get_messages_by_time_range(self, db: Session, thread_id: int, 
                                   start_time: datetime, end_time: datetime) -> List[ChatMessage]:
-        return db.query(ChatMessage).filter(
+        return list(db.scalars(select(ChatMessage).where(
             and_(
                 ChatMessage.thread_id == thread_id,
                 ChatMessage.timestamp >= start_time,
                 ChatMessage.timestamp <= end_time
             )
-        ).order_by(ChatMessage.timestamp.asc()).all()
+        ).order_by(ChatMessage.timestamp.asc())))
 
     def get_messages_with_filters(self, db: Session, thread_id: int,
                                  role: Optional[str] = None,
                                  search_content: Optional[str] = None,
-                                 skip: int = 0, limit: int = 100) -> List[ChatMessage]:
-        query = db.query(ChatMessage).filter(ChatMessage.thread_id == thread_id)
+                                 skip: int = 0, limit: int = 100,
+                                 before_id: Optional[int] = None,
+                                 after_id: Optional[int] = None) -> List[ChatMessage]:
+        stmt = select(ChatMessage).where(ChatMessage.thread_id == thread_id)
         
         if role:
-            query = query.filter(ChatMessage.role == role)
+            stmt = stmt.where(ChatMessage.role == role)
         
         if search_content:
-            query = query.filter(ChatMessage.content.contains(search_content))
+            stmt = self._search_content(db.get_bind().dialect.name, stmt, search_content)
         
-        return query.order_by(ChatMessage.timestamp.asc()).offset(skip).limit(limit).all()
+        return self._page_rows(db.scalars(self._paginate(stmt, skip, limit, before_id, after_id)), before_id)
+
+    async def stream_owned_thread_messages_async(self, db: AsyncSession, *, thread_id: int, user_id: int,
+                                                 batch_size: int = 100, **filters) -> AsyncIterator[Row[Any]]:
+        """
+        Like `get_owned_thread_messages_async` in chronological order (no `before_id`), but yields the
+        rows as the database cursor produces them, `batch_size` at a time, instead of loading the whole list.
+        """
+        stmt = self._owned_thread_messages_stmt(
+            db.get_bind().dialect.name, thread_id=thread_id, user_id=user_id, **filters
+        ).execution_options(yield_per=batch_size)
+        result = await db.stream(stmt)
+        async for message in result:
+            yield message
+
+    @staticmethod
+    def _owned_stmt(id: int, user_id: int):
+        return select(ChatMessage).join(
+            Thread, Thread.id == ChatMessage.thread_id
+        ).where(
+            and_(
+                ChatMessage.id == id,
+                Thread.user_id == user_id
+            )
+        )
+
+    def get_owned(self, db: Session, *, id: int, user_id: int) -> Optional[ChatMessage]:
+        """
+        Retrieves a message only if its thread belongs to the given user, in a single query.
+        """
+        return db.scalars(self._owned_stmt(id, user_id)).first()
+
+    async def get_owned_async(self, db: AsyncSession, *, id: int, user_id: int) -> Optional[ChatMessage]:
+        """
+        Same as `get_owned`, on an AsyncSession.
+        """
+        return (await db.scalars(self._owned_stmt(id, user_id))).first()
+
+    def _owned_thread_messages_stmt(self, dialect_name: str, *, thread_id: int, user_id: int,
+                                    role: Optional[str] = None,
+                                    search_content: Optional[str] = None,
+                                    start_time: Optional[datetime] = None,
+                                    end_time: Optional[datetime] = None,
+                                    skip: int = 0, limit: Optional[int] = 100,
+                                    before_id: Optional[int] = None,
+                                    after_id: Optional[int] = None):
+        stmt = select(*_MESSAGE_COLUMNS).join(
+            Thread, Thread.id == ChatMessage.thread_id
+        ).where(
+            and_(
+                ChatMessage.thread_id == thread_id,
+                Thread.user_id == user_id
+            )
+        )
+
+        if role:
+            stmt = stmt.where(ChatMessage.role == role)
+        if search_content:
+            stmt = self._search_content(dialect_name, stmt, search_content)
+        if start_time is not None:
+            stmt = stmt.where(ChatMessage.timestamp >= start_time)
+        if end_time is not None:
+            stmt = stmt.where(ChatMessage.timestamp <= end_time)
+
+        return self._paginate(stmt, skip, limit, before_id, after_id)
+
+    def get_owned_thread_messages(self, db: Session, *, thread_id: int, user_id: int,
+                                  before_id: Optional[int] = None, **filters) -> List[Row[Any]]:
+        """
+        Lists a thread's messages only if the thread belongs to the given user: the ownership
+        check is a JOIN in the same query, so an empty list means "no messages" or "not the user's".
+        Returns column rows (see `_MESSAGE_COLUMNS`), not ChatMessage instances.
+        Filters: role, search_content, start_time, end_time, skip, limit, after_id.
+        """
+        stmt = self._owned_thread_messages_stmt(
+            db.get_bind().dialect.name, thread_id=thread_id, user_id=user_id, before_id=before_id, **filters
+        )
+        return self._page_rows(db.execute(stmt), before_id)
+
+    async def get_owned_thread_messages_async(self, db: AsyncSession, *, thread_id: int, user_id: int,
+                                              before_id: Optional[int] = None, **filters) -> List[Row[Any]]:
+        """
+        Same as `get_owned_thread_messages`, on an AsyncSession.
+        """
+        stmt = self._owned_thread_messages_stmt(
+            db.get_bind().dialect.name, thread_id=thread_id, user_id=user_id, before_id=before_id, **filters
+        )
+        return self._page_rows(await db.execute(stmt), before_id)
 
     def get_thread_messages_count(self, db: Session, thread_id: int) -> int:
-        return db.query(ChatMessage).filter(ChatMessage.thread_id == thread_id).count()
+        # Plain SELECT count(*) ... WHERE; Query.count() would wrap the whole query in a subquery
+        stmt = select(func.count()).select_from(ChatMessage).where(ChatMessage.thread_id == thread_id)
+        return db.execute(stmt).scalar_one()
 
 
 # Create repository instances
@@ -1,24 +1,34 @@
 # In app/src/repositories/thread.py
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.src.repositories.base import BaseRepository
 from app.src.models import Thread as ThreadModel
 from app.src.schema import ThreadCreate, ThreadUpdate
 
 class ThreadRepository(BaseRepository[ThreadModel, ThreadCreate, ThreadUpdate]):
-    def create(self, db: Session, *, obj_in: ThreadCreate) -> ThreadModel:
-        db_obj = ThreadModel(**obj_in.model_dump())
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    def _owned_stmt(self, id: int, user_id: int):
+        return select(self.model).where(self.model.id == id, self.model.user_id == user_id)
+
+    def get_owned(self, db: Session, *, id: int, user_id: int) -> Optional[ThreadModel]:
+        """
+        Retrieves a thread only if it belongs to the given user, in a single query.
+        """
+        return db.scalars(self._owned_stmt(id, user_id)).first()
+
+    async def get_owned_async(self, db: AsyncSession, *, id: int, user_id: int) -> Optional[ThreadModel]:
+        """
+        Same as `get_owned`, on an AsyncSession.
+        """
+        return (await db.scalars(self._owned_stmt(id, user_id))).first()
 
     def get_by_name(self, db: Session, *, name: str) -> Optional[ThreadModel]:
         """
         Retrieves a thread by its name.
         """
-        return db.query(self.model).filter(self.model.name == name).first()
+        return db.scalars(select(self.model).where(self.model.name == name)).first()
 
     def search_by_name(
         self, db: Session, *, search_term: str, skip: int = 0, limit: int = 100
@@ -35,20 +45,52 @@ class ThreadRepository(BaseRepository[ThreadModel, ThreadCreate, ThreadUpdate]):
         )
         return query.order_by(self.model.name).offset(skip).limit(limit).all()
 
+    def _by_user_id_stmt(self, user_id: int, skip: int, limit: int, load_messages: bool,
+                         after_id: Optional[int] = None):
+        stmt = (
+            select(self.model)
+            .where(self.model.user_id == user_id)
+            # Most recent first; id breaks ties so the keyset below is a total order
+            .order_by(self.model.created_at.desc(), self.model.id.desc())
+            .limit(limit)
+        )
+        if after_id is None:
+            stmt = stmt.offset(skip)
+        else:
+            # Keyset: the threads that sort after `after_id`, i.e. older than it
+            after_created_at = (
+                select(self.model.created_at).where(self.model.id == after_id).scalar_subquery()
+            )
+            stmt = stmt.where(
+                or_(
+                    self.model.created_at < after_created_at,
+                    and_(self.model.created_at == after_created_at, self.model.id < after_id),
+                )
+            )
+        if load_messages:
+            # One extra SELECT ... WHERE thread_id IN (...) for the whole page, not one per thread
+            stmt = stmt.options(selectinload(self.model.chat_messages))
+        return stmt
+
     def get_by_user_id(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100, load_messages: bool = False,
+        after_id: Optional[int] = None
     ) -> List[ThreadModel]:
         """
         Retrieves threads by user ID.
+        With `load_messages`, each thread's `chat_messages` is loaded as well.
+        Pass `after_id` (the last thread of the previous page) instead of `skip` for keyset pagination.
         """
-        return (
-            db.query(self.model)
-            .filter(self.model.user_id == user_id)
-            .order_by(self.model.created_at.desc())  # Order by most recent first
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return list(db.scalars(self._by_user_id_stmt(user_id, skip, limit, load_messages, after_id)))
+
+    async def get_by_user_id_async(
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100, load_messages: bool = False,
+        after_id: Optional[int] = None
+    ) -> List[ThreadModel]:
+        """
+        Same as `get_by_user_id`, on an AsyncSession.
+        """
+        return list(await db.scalars(self._by_user_id_stmt(user_id, skip, limit, load_messages, after_id)))
 
 # Create a single repository instance for use in your services
 thread_repo = ThreadRepository(ThreadModel)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.src.models import User, AccessGroup
 from app.src.schema import UserCreate, UserUpdate, AccessGroupCreate, AccessGroupUpdate
@@ -6,14 +7,25 @@ from app.src.schema.user import UserCreateHashed, UserUpdateHashed
 from .base import BaseRepository
 
 
+def _apply_update(db_obj, obj_in) -> None:
+    """
+    Set the fields the caller actually provided. An explicit None clears a nullable column
+    (e.g. User.group_id) and is ignored for a NOT NULL one, which it could only violate.
+    """
+    columns = db_obj.__table__.columns
+    for field, value in obj_in.model_dump(exclude_unset=True).items():
+        column = columns.get(field)
+        if value is None and column is not None and not column.nullable:
+            continue
+        setattr(db_obj, field, value)
+
+
 class UserRepository(BaseRepository[User, UserCreateHashed, UserUpdateHashed]):
     def get_by_username(self, db: Session, username: str) -> Optional[User]:
-        return db.query(User).filter(User.username == username).first()
+        return db.scalars(select(User).where(User.username == username)).first()
 
     def update(self, db: Session, *, db_obj: User, obj_in: UserUpdateHashed) -> User:
-        for field in obj_in.__fields__:
-            if hasattr(db_obj, field) and getattr(obj_in, field) is not None:
-                setattr(db_obj, field, getattr(obj_in, field))
+        _apply_update(db_obj, obj_in)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
@@ -22,12 +34,10 @@ class UserRepository(BaseRepository[User, UserCreateHashed, UserUpdateHashed]):
 
 class AccessGroupRepository(BaseRepository[AccessGroup, AccessGroupCreate, AccessGroupUpdate]):
     def get_by_name(self, db: Session, name: str) -> Optional[AccessGroup]:
-        return db.query(AccessGroup).filter(AccessGroup.name == name).first()
+        return db.scalars(select(AccessGroup).where(AccessGroup.name == name)).first()
 
     def update(self, db: Session, *, db_obj: AccessGroup, obj_in: AccessGroupUpdate) -> AccessGroup:
-        for field in obj_in.__fields__:
-            if hasattr(db_obj, field) and getattr(obj_in, field) is not None:
-                setattr(db_obj, field, getattr(obj_in, field))
+        _apply_update(db_obj, obj_in)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
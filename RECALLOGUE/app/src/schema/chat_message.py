@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -22,8 +22,7 @@ class ChatMessageBase(BaseModel):
     message_metadata: Optional[Dict[str, Any]] = None
 
     # Allow a different name in the API ('metadata') than in the code ('message_metadata')
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # 2. Create Model: Properties to receive on item creation
@@ -56,7 +55,4 @@ class ChatMessage(ChatMessageBase):
 
     # This configuration allows Pydantic to create the model
     # from an arbitrary ORM object (like your SQLAlchemy ChatMessage instance).
-    class Config:
-        from_attributes = True
-        # For Pydantic v1, you would use:
-        # orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(populate_by_name=True, from_attributes=True)
\ No newline at end of file
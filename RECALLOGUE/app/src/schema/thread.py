@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from datetime import datetime
 from .chat_message import ChatMessage
@@ -23,5 +23,4 @@ class Thread(ThreadBase):
     updated_at: datetime
     messages: Optional[List[ChatMessage]] = None
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
 # It's good practice to import and alias to avoid confusion
@@ -42,10 +43,10 @@ class ChatMessageService:
             message_metadata=message.message_metadata  # Pydantic handles the alias on input
         )
 
-        # The database will handle defaults for timestamp and created_at
+        # The defaults for timestamp and created_at are filled in on flush, and sessions don't
+        # expire on commit, so there is nothing left to refresh
         db.add(db_message)
         db.commit()
-        db.refresh(db_message)
 
         # Automatically convert the SQLAlchemy model to a Pydantic schema for the response
         return ChatMessage.from_orm(db_message)
@@ -59,22 +60,88 @@ class ChatMessageService:
             return ChatMessage.from_orm(db_message)
         return None
 
+    def get_owned_message(self, db: Session, message_id: int, user_id: int) -> Optional[ChatMessage]:
+        """
+        Retrieves a message only if its thread belongs to the given user (one query).
+        Returns None if the message doesn't exist or isn't the user's.
+        """
+        db_message = chat_message_repo.get_owned(db, id=message_id, user_id=user_id)
+        if db_message:
+            return ChatMessage.from_orm(db_message)
+        return None
+
+    async def get_owned_message_async(self, db: AsyncSession, message_id: int, user_id: int) -> Optional[ChatMessage]:
+        """
+        Same as `get_owned_message`, on an AsyncSession.
+        """
+        db_message = await chat_message_repo.get_owned_async(db, id=message_id, user_id=user_id)
+        if db_message:
+            return ChatMessage.from_orm(db_message)
+        return None
+
     def get_messages_by_thread(self, db: Session, thread_id: int,
-                              skip: int = 0, limit: int = 100) -> List[ChatMessage]:
+                              skip: int = 0, limit: int = 100,
+                              before_id: Optional[int] = None,
+                              after_id: Optional[int] = None) -> List[ChatMessage]:
         """
         Retrieves all messages for a given thread using automatic schema mapping.
+        Pass `before_id` (the oldest message id already shown) to page backwards by keyset instead of offset,
+        or `after_id` (the newest one) to page forwards.
         """
         db_thread = thread_repo.get(db, id=thread_id)
         if not db_thread:
             return []
 
-        db_messages = chat_message_repo.get_messages_by_thread(db, db_thread.id, skip, limit)
+        db_messages = chat_message_repo.get_messages_by_thread(db, db_thread.id, skip, limit, before_id, after_id)
 
         # Use a list comprehension for a clean and efficient mapping
         return [ChatMessage.from_orm(msg) for msg in db_messages]
 
+    def list_for_owned_thread(self, db: Session, user_id: int, thread_id: int,
+                              **filters) -> Optional[List[ChatMessage]]:
+        """
+        Lists a thread's messages if the thread belongs to the given user, returning None otherwise.
+        Accepts the filters of chat_message_repo.get_owned_thread_messages (role, search_content,
+        start_time, end_time, skip, limit, before_id, after_id). Ownership is checked in the same query as the
+        messages; the thread is only looked up separately when that query comes back empty.
+        """
+        db_messages = chat_message_repo.get_owned_thread_messages(
+            db, thread_id=thread_id, user_id=user_id, **filters
+        )
+        if not db_messages and thread_repo.get_owned(db, id=thread_id, user_id=user_id) is None:
+            return None
+
+        return [ChatMessage.from_orm(msg) for msg in db_messages]
+
+    async def list_for_owned_thread_async(self, db: AsyncSession, user_id: int, thread_id: int,
+                                          **filters) -> Optional[List[ChatMessage]]:
+        """
+        Same as `list_for_owned_thread`, on an AsyncSession.
+        """
+        db_messages = await chat_message_repo.get_owned_thread_messages_async(
+            db, thread_id=thread_id, user_id=user_id, **filters
+        )
+        if not db_messages and await thread_repo.get_owned_async(db, id=thread_id, user_id=user_id) is None:
+            return None
+
+        return [ChatMessage.from_orm(msg) for msg in db_messages]
+
+    async def stream_for_owned_thread_async(self, db: AsyncSession, user_id: int, thread_id: int,
+                                            **filters) -> AsyncIterator[ChatMessage]:
+        """
+        Yields a thread's messages one by one, in chronological order, as they are read from the database.
+        Yields nothing if the thread isn't the user's; check ownership first to tell that case apart.
+        Accepts the role, search_content, start_time, end_time, skip and limit filters.
+        """
+        async for db_message in chat_message_repo.stream_owned_thread_messages_async(
+            db, thread_id=thread_id, user_id=user_id, **filters
+        ):
+            yield ChatMessage.from_orm(db_message)
+
     def get_messages_by_role(self, db: Session, thread_id: int, role: str,
-                            skip: int = 0, limit: int = 100) -> List[ChatMessage]:
+                            skip: int = 0, limit: int = 100,
+                            before_id: Optional[int] = None,
+                            after_id: Optional[int] = None) -> List[ChatMessage]:
         """
         Retrieves messages filtered by role within a thread.
         """
@@ -82,7 +149,7 @@ class ChatMessageService:
         if not db_thread:
             return []
 
-        db_messages = chat_message_repo.get_messages_by_role(db, db_thread.id, role, skip, limit)
+        db_messages = chat_message_repo.get_messages_by_role(db, db_thread.id, role, skip, limit, before_id, after_id)
         return [ChatMessage.from_orm(msg) for msg in db_messages]
 
     def get_messages_by_time_range(self, db: Session, thread_id: int,
@@ -100,7 +167,9 @@ class ChatMessageService:
     def get_messages_with_filters(self, db: Session, thread_id: int,
                                  role: Optional[str] = None,
                                  search_content: Optional[str] = None,
-                                 skip: int = 0, limit: int = 100) -> List[ChatMessage]:
+                                 skip: int = 0, limit: int = 100,
+                                 before_id: Optional[int] = None,
+                                 after_id: Optional[int] = None) -> List[ChatMessage]:
         """
         Retrieves messages with optional filters for role and content.
         """
@@ -109,7 +178,7 @@ class ChatMessageService:
             return []
 
         db_messages = chat_message_repo.get_messages_with_filters(
-            db, db_thread.id, role, search_content, skip, limit
+            db, db_thread.id, role, search_content, skip, limit, before_id, after_id
         )
         return [ChatMessage.from_orm(msg) for msg in db_messages]
 
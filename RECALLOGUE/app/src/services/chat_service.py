@@ -1,4 +1,5 @@
-from time import sleep
+import asyncio
+from typing import AsyncIterator
 
 from app.src.schema.message_schemas import SystemResponse, UserMessageRequest
 
@@ -6,14 +7,17 @@ class ChatService:
     """
     Service that is responcible for accepting user messages and prividing responses.
     """
-    def message_request(self, message : UserMessageRequest):
+    async def message_request(self, message : UserMessageRequest) -> AsyncIterator[SystemResponse]:
+        """
+        Async generator of response chunks, so the endpoint can stream it on the event loop.
+        """
         yield SystemResponse(
             content="message 1", 
             sources=None,
             attachments=None,
             other=None
         )
-        sleep(0.5)
+        await asyncio.sleep(0.5)
         yield SystemResponse(
             content="message 2", 
             sources=None,
@@ -1,9 +1,9 @@
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.src.models import Thread as ThreadModel
-from app.src.repositories import thread_repo
-from app.src.schema import Thread, ThreadCreate, ThreadUpdate
-from .chat_message import chat_message_service
+from app.src.repositories import thread_repo, chat_message_repo
+from app.src.schema import ChatMessage, Thread, ThreadCreate, ThreadUpdate
 from fastapi import HTTPException, status
 
 class ThreadService:
@@ -18,17 +18,8 @@ class ThreadService:
         - Input: ThreadCreate schema
         - Output: Thread schema (without messages)
         """
-        # Create the SQLAlchemy model instance from the Pydantic schema
-        db_thread = ThreadModel(
-            name=thread_in.name,
-            user_id=thread_in.user_id,
-            allowed_sources=thread_in.allowed_sources
-            # The database will handle defaults for created_at, updated_at
-        )
-
-        db.add(db_thread)
-        db.commit()
-        db.refresh(db_thread)
+        # One INSERT ... RETURNING; the defaults for created_at, updated_at come back with the row
+        db_thread = thread_repo.create(db, obj_in=thread_in)
 
         # Automatically convert the SQLAlchemy model to a Pydantic schema
         return Thread.from_orm(db_thread)
@@ -47,10 +38,40 @@ class ThreadService:
 
         # If requested, fetch and attach the messages
         if include_messages:
-            # Get messages for this thread
-            messages = chat_message_service.get_messages_by_thread(db, thread_id=db_thread.id)
-            # Add messages as an attribute to the thread object
-            thread.messages = messages
+            # The thread is already loaded, so go straight to the repository:
+            # all of its messages come back in one query
+            db_messages = chat_message_repo.get_messages_by_thread(db, db_thread.id)
+            thread.messages = [ChatMessage.from_orm(msg) for msg in db_messages]
+
+        return thread
+
+    def get_owned_by_user(self, db: Session, thread_id: int, user_id: int) -> Optional[Thread]:
+        """
+        Retrieves a thread only if it exists and belongs to the given user (one query).
+        Returns None otherwise, without telling the two cases apart.
+        """
+        db_thread = thread_repo.get_owned(db, id=thread_id, user_id=user_id)
+        if not db_thread:
+            return None
+
+        return Thread.from_orm(db_thread)
+
+    async def get_owned_by_user_async(self, db: AsyncSession, thread_id: int, user_id: int,
+                                      include_messages: bool = False) -> Optional[Thread]:
+        """
+        Same as `get_owned_by_user`, on an AsyncSession.
+        Optionally includes the thread's messages (the first 100, like `get_by_id`).
+        """
+        db_thread = await thread_repo.get_owned_async(db, id=thread_id, user_id=user_id)
+        if not db_thread:
+            return None
+
+        thread = Thread.from_orm(db_thread)
+        if include_messages:
+            db_messages = await chat_message_repo.get_owned_thread_messages_async(
+                db, thread_id=thread_id, user_id=user_id
+            )
+            thread.messages = [ChatMessage.from_orm(msg) for msg in db_messages]
 
         return thread
 
@@ -59,29 +80,48 @@ class ThreadService:
         Verifies if a thread exists and belongs to a specific user.
         Returns True if the thread exists and belongs to the user, False otherwise.
         """
-        db_thread = thread_repo.get(db, id=thread_id)
-        if not db_thread:
-            return False
-
-        return db_thread.user_id == user_id
+        return thread_repo.get_owned(db, id=thread_id, user_id=user_id) is not None
 
-    def get_all(self, db: Session, skip: int = 0, limit: int = 100) -> List[Thread]:
+    def get_all(self, db: Session, skip: int = 0, limit: int = 100,
+                after_id: Optional[int] = None) -> List[Thread]:
         """
         Retrieves a list of threads. Messages are not included for performance.
         """
-        db_threads = thread_repo.get_multi(db, skip=skip, limit=limit)
+        db_threads = thread_repo.get_multi(db, skip=skip, limit=limit, after_id=after_id)
 
         # Use a list comprehension for clean and efficient mapping
         return [Thread.from_orm(thread) for thread in db_threads]
 
-    def get_by_user_id(self, db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Thread]:
+    @staticmethod
+    def _to_schema(db_thread: ThreadModel, include_messages: bool) -> Thread:
+        thread = Thread.from_orm(db_thread)
+        if include_messages:
+            thread.messages = [ChatMessage.from_orm(msg) for msg in db_thread.chat_messages]
+        return thread
+
+    def get_by_user_id(self, db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                       include_messages: bool = False, after_id: Optional[int] = None) -> List[Thread]:
         """
-        Retrieves a list of threads by user ID. Messages are not included for performance.
+        Retrieves a list of threads by user ID.
+        Messages are not included unless asked for; then all of them come in one extra query.
+        Pass `after_id` (the last thread already shown) instead of `skip` to get the next page by keyset.
         """
-        db_threads = thread_repo.get_by_user_id(db, user_id=user_id, skip=skip, limit=limit)
+        db_threads = thread_repo.get_by_user_id(
+            db, user_id=user_id, skip=skip, limit=limit, load_messages=include_messages, after_id=after_id
+        )
 
         # Use a list comprehension for clean and efficient mapping
-        return [Thread.from_orm(thread) for thread in db_threads]
+        return [self._to_schema(thread, include_messages) for thread in db_threads]
+
+    async def get_by_user_id_async(self, db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100,
+                                   include_messages: bool = False, after_id: Optional[int] = None) -> List[Thread]:
+        """
+        Same as `get_by_user_id`, on an AsyncSession.
+        """
+        db_threads = await thread_repo.get_by_user_id_async(
+            db, user_id=user_id, skip=skip, limit=limit, load_messages=include_messages, after_id=after_id
+        )
+        return [self._to_schema(thread, include_messages) for thread in db_threads]
 
     def update(self, db: Session, thread_id: int, thread_in: ThreadUpdate) -> Optional[Thread]:
         """
@@ -33,8 +33,9 @@ class AccessGroupService:
             return AccessGroupInDB.model_validate(db_access_group)
         return None
 
-    def get_access_groups(self, db: Session, skip: int = 0, limit: int = 100) -> List[AccessGroupInDB]:
-        db_access_groups = access_group_repo.get_multi(db, skip=skip, limit=limit)
+    def get_access_groups(self, db: Session, skip: int = 0, limit: int = 100,
+                          after_id: Optional[int] = None) -> List[AccessGroupInDB]:
+        db_access_groups = access_group_repo.get_multi(db, skip=skip, limit=limit, after_id=after_id)
         return [AccessGroupInDB.model_validate(ag) for ag in db_access_groups]
 
     def update_access_group(self, db: Session, access_group_id: int, 
@@ -94,8 +95,9 @@ class UserService:
             return UserInDB.model_validate(db_user)
         return None
 
-    def get_users(self, db: Session, skip: int = 0, limit: int = 100) -> List[UserInDB]:
-        db_users = user_repo.get_multi(db, skip=skip, limit=limit)
+    def get_users(self, db: Session, skip: int = 0, limit: int = 100,
+                  after_id: Optional[int] = None) -> List[UserInDB]:
+        db_users = user_repo.get_multi(db, skip=skip, limit=limit, after_id=after_id)
         return [UserInDB.model_validate(user) for user in db_users]
 
     def update_user(self, db: Session, user_id: int, user_in: UserUpdate) -> Optional[UserInDB]:
@@ -3,6 +3,7 @@ from .security import (
     get_password_hash,
     verify_password,
     create_access_token,
+    decode_access_token,
     verify_token
 )
 
@@ -18,5 +19,6 @@ __all__ = [
     "get_password_hash",
     "verify_password",
     "create_access_token",
+    "decode_access_token",
     "verify_token"
 ]
\ No newline at end of file
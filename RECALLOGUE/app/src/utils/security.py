@@ -1,9 +1,17 @@
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 import bcrypt
-from jose import JWTError, jwt
+import jwt
 from app.src.config import settings
 
+# PyJWT verifies HMAC through OpenSSL (hashlib/hmac); encode the key once, not per token
+_JWT_KEY = settings.SECRET_KEY.encode("utf-8")
+_JWT_ALGORITHMS = [settings.ALGORITHM]
+# Cookie clients send the same token on every request; remember that many verified tokens
+JWT_CACHE_SIZE = 4096
+
 
 def get_password_hash(password: str) -> str:
     try:
@@ -18,6 +26,23 @@ def get_password_hash(password: str) -> str:
         raise ValueError(f"Failed to hash password: {str(e)}")
 
 
+def calibrate_hashing_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Returns the highest bcrypt cost whose hash takes at most `target_ms` on this host,
+    but never less than `min_rounds`. Each extra round doubles the work, so only one
+    hash (at `min_rounds`) is timed and the rest is extrapolated.
+    """
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=min_rounds))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         # Truncate password to 72 bytes if needed (bcrypt limitation)
@@ -44,15 +69,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
             expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=settings.ALGORITHM)
         return encoded_jwt
     except Exception as e:
         raise ValueError(f"Failed to create access token: {str(e)}")
 
 
+@lru_cache(maxsize=JWT_CACHE_SIZE)
+def _decode_verified(token: str) -> dict:
+    # Only tokens that pass verification get cached (lru_cache doesn't keep exceptions); the cache key is
+    # the whole token, signature included, so a hit is the exact string that was verified before
+    return jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decodes and validates a token created by `create_access_token`.
+    Raises jwt.InvalidTokenError if the token is malformed, forged or expired.
+    Tokens already verified are served from a cache; only their expiry is checked again.
+    """
+    claims = _decode_verified(token)
+    exp = claims.get("exp")
+    if exp is not None and exp <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return dict(claims)
+
+
 def verify_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
+        return decode_access_token(token)
+    except jwt.InvalidTokenError:
         return None
\ No newline at end of file
@@ -104,4 +104,23 @@ def test_login_and_create_token_invalid_credentials(db_session):
 
     # Try to login with non-existent user - should raise an exception
     with pytest.raises(Exception):
-        auth_service.login_and_create_token(db_session, form_data)
\ No newline at end of file
+        auth_service.login_and_create_token(db_session, form_data)
+
+def test_access_token_round_trip():
+    from datetime import timedelta
+    from app.src.utils.security import create_access_token, verify_token
+
+    token = create_access_token({"sub": "testuser5"})
+    assert verify_token(token)["sub"] == "testuser5"
+
+    # Tampered and expired tokens are rejected
+    assert verify_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB")) is None
+    expired = create_access_token({"sub": "testuser5"}, expires_delta=timedelta(seconds=-1))
+    assert verify_token(expired) is None
+
+def test_calibrate_hashing_rounds():
+    from app.src.utils.security import calibrate_hashing_rounds
+
+    # Never below the floor, never above the cap
+    assert calibrate_hashing_rounds(0, min_rounds=4) == 4
+    assert calibrate_hashing_rounds(10 ** 9, min_rounds=4, max_rounds=8) == 8
\ No newline at end of file
@@ -186,4 +186,162 @@ def test_delete_message(db_session):
 
     # Verify the message was deleted by trying to retrieve it
     retrieved_message = chat_message_service.get_message(db_session, message_id=created_message.id)
-    assert retrieved_message is None
\ No newline at end of file
+    assert retrieved_message is None
+
+
+def test_get_owned_message(db_session):
+    from app.src.services.user import user_service
+    from app.src.schema import UserCreate
+
+    owner = user_service.create_user(db_session, UserCreate(username="message_owner", password="test_password"))
+    other = user_service.create_user(db_session, UserCreate(username="message_other", password="test_password"))
+
+    created_thread = thread_service.create(db_session, ThreadCreate(name="Owned Thread", user_id=owner.id))
+    message_in = ChatMessageCreate(
+        thread_id=created_thread.id,
+        role=MessageRole.USER,
+        content="Owned message",
+        sources=[],
+        links=[],
+        message_metadata={}
+    )
+    created_message = chat_message_service.create_message(db_session, created_thread.id, message_in)
+
+    # Only the owner of the message's thread gets the message back
+    owned_message = chat_message_service.get_owned_message(db_session, message_id=created_message.id, user_id=owner.id)
+    assert owned_message is not None
+    assert owned_message.content == "Owned message"
+
+    assert chat_message_service.get_owned_message(db_session, message_id=created_message.id, user_id=other.id) is None
+
+
+def test_get_messages_by_thread_before_id(db_session):
+    thread_in = ThreadCreate(name="Test Thread for Keyset Pagination")
+    created_thread = thread_service.create(db_session, thread_in)
+
+    created = [
+        chat_message_service.create_message(
+            db_session,
+            created_thread.id,
+            ChatMessageCreate(thread_id=created_thread.id, role=MessageRole.USER, content=f"Message {i}")
+        )
+        for i in range(5)
+    ]
+
+    # The page right before the last message, oldest first
+    page = chat_message_service.get_messages_by_thread(
+        db_session, created_thread.id, limit=2, before_id=created[-1].id
+    )
+    assert [m.content for m in page] == ["Message 2", "Message 3"]
+
+    # Paging further back from the oldest message of that page
+    page = chat_message_service.get_messages_by_thread(
+        db_session, created_thread.id, limit=2, before_id=page[0].id
+    )
+    assert [m.content for m in page] == ["Message 0", "Message 1"]
+
+    # And forwards again from the newest message of that page
+    page = chat_message_service.get_messages_by_thread(
+        db_session, created_thread.id, limit=2, after_id=page[-1].id
+    )
+    assert [m.content for m in page] == ["Message 2", "Message 3"]
+
+def test_get_thread_messages_count(db_session):
+    from app.src.repositories import chat_message_repo
+
+    thread_in = ThreadCreate(name="Test Thread for Count")
+    created_thread = thread_service.create(db_session, thread_in)
+    assert chat_message_repo.get_thread_messages_count(db_session, created_thread.id) == 0
+
+    for i in range(3):
+        chat_message_service.create_message(
+            db_session,
+            created_thread.id,
+            ChatMessageCreate(thread_id=created_thread.id, role=MessageRole.USER, content=f"Message {i}")
+        )
+    assert chat_message_repo.get_thread_messages_count(db_session, created_thread.id) == 3
+
+def test_get_messages_with_filters_search_content(db_session):
+    thread_in = ThreadCreate(name="Test Thread for Search")
+    created_thread = thread_service.create(db_session, thread_in)
+
+    for role, content in [(MessageRole.USER, "Where is the annual report?"),
+                          (MessageRole.ASSISTANT, "The annual report is in the archive."),
+                          (MessageRole.USER, "Thanks")]:
+        chat_message_service.create_message(
+            db_session,
+            created_thread.id,
+            ChatMessageCreate(thread_id=created_thread.id, role=role, content=content)
+        )
+
+    found = chat_message_service.get_messages_with_filters(
+        db_session, created_thread.id, search_content="annual report"
+    )
+    assert len(found) == 2
+
+    found = chat_message_service.get_messages_with_filters(
+        db_session, created_thread.id, role="assistant", search_content="annual report"
+    )
+    assert [m.content for m in found] == ["The annual report is in the archive."]
+
+def test_list_for_owned_thread(db_session):
+    from app.src.services.user import user_service
+    from app.src.schema import UserCreate
+
+    owner = user_service.create_user(db_session, UserCreate(username="list_owner", password="test_password"))
+    other = user_service.create_user(db_session, UserCreate(username="list_other", password="test_password"))
+    created_thread = thread_service.create(db_session, ThreadCreate(name="Owned Thread", user_id=owner.id))
+    empty_thread = thread_service.create(db_session, ThreadCreate(name="Empty Thread", user_id=owner.id))
+
+    for role in [MessageRole.USER, MessageRole.ASSISTANT]:
+        chat_message_service.create_message(
+            db_session,
+            created_thread.id,
+            ChatMessageCreate(thread_id=created_thread.id, role=role, content=f"{role.value} message")
+        )
+
+    messages = chat_message_service.list_for_owned_thread(db_session, user_id=owner.id, thread_id=created_thread.id)
+    assert [m.content for m in messages] == ["user message", "assistant message"]
+
+    messages = chat_message_service.list_for_owned_thread(
+        db_session, user_id=owner.id, thread_id=created_thread.id, role="assistant"
+    )
+    assert [m.content for m in messages] == ["assistant message"]
+
+    # An owned thread without messages is an empty list; someone else's thread is None
+    assert chat_message_service.list_for_owned_thread(db_session, user_id=owner.id, thread_id=empty_thread.id) == []
+    assert chat_message_service.list_for_owned_thread(db_session, user_id=other.id, thread_id=created_thread.id) is None
+
+def test_list_for_owned_thread_async():
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    async def run():
+        async_engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+            owner, other = User(username="async_owner", hashed_password="x"), User(username="async_other", hashed_password="x")
+            db.add_all([owner, other])
+            await db.flush()
+            thread = Thread(name="Async Thread", user_id=owner.id)
+            db.add(thread)
+            await db.flush()
+            db.add_all([ChatMessage(thread_id=thread.id, role="user", content=f"Message {i}") for i in range(3)])
+            await db.commit()
+
+            messages = await chat_message_service.list_for_owned_thread_async(db, user_id=owner.id, thread_id=thread.id)
+            assert [m.content for m in messages] == ["Message 0", "Message 1", "Message 2"]
+
+            page = await chat_message_service.list_for_owned_thread_async(
+                db, user_id=owner.id, thread_id=thread.id, limit=1, before_id=messages[-1].id
+            )
+            assert [m.content for m in page] == ["Message 1"]
+
+            assert await chat_message_service.list_for_owned_thread_async(db, user_id=other.id, thread_id=thread.id) is None
+
+        await async_engine.dispose()
+
+    asyncio.run(run())
\ No newline at end of file
@@ -190,4 +190,112 @@ def test_get_threads_by_user_id(db_session):
     # Check that user2 doesn't have user1's threads
     user2_thread_names = [t.name for t in user2_threads]
     assert "User1 Thread 1" not in user2_thread_names
-    assert "User1 Thread 2" not in user2_thread_names
\ No newline at end of file
+    assert "User1 Thread 2" not in user2_thread_names
+
+
+def test_get_thread_owned_by_user(db_session):
+    from app.src.services.user import user_service
+    from app.src.schema import UserCreate
+
+    owner = user_service.create_user(db_session, UserCreate(username="owner_user", password="test_password"))
+    other = user_service.create_user(db_session, UserCreate(username="other_user", password="test_password"))
+
+    created_thread = thread_service.create(db_session, ThreadCreate(name="Owned Thread", user_id=owner.id))
+
+    # The owner gets the thread; anyone else gets None, same as for a missing thread
+    owned_thread = thread_service.get_owned_by_user(db_session, thread_id=created_thread.id, user_id=owner.id)
+    assert owned_thread is not None
+    assert owned_thread.id == created_thread.id
+
+    assert thread_service.get_owned_by_user(db_session, thread_id=created_thread.id, user_id=other.id) is None
+    assert thread_service.get_owned_by_user(db_session, thread_id=created_thread.id + 1000, user_id=owner.id) is None
+
+
+def test_get_thread_by_id_with_messages(db_session):
+    from app.src.services.chat_message import chat_message_service
+    from app.src.schema import ChatMessageCreate
+    from app.src.schema.chat_message import MessageRole
+
+    thread_in = ThreadCreate(name="Thread With Messages")
+    created_thread = thread_service.create(db_session, thread_in)
+
+    for content in ["First", "Second"]:
+        chat_message_service.create_message(
+            db_session,
+            thread_id=created_thread.id,
+            message=ChatMessageCreate(thread_id=created_thread.id, role=MessageRole.USER, content=content)
+        )
+
+    without_messages = thread_service.get_by_id(db_session, thread_id=created_thread.id)
+    assert without_messages.messages is None
+
+    with_messages = thread_service.get_by_id(db_session, thread_id=created_thread.id, include_messages=True)
+    assert [m.content for m in with_messages.messages] == ["First", "Second"]
+
+def test_create_many_threads(db_session):
+    from app.src.repositories import thread_repo
+
+    threads_in = [ThreadCreate(name=f"Bulk Thread {i}") for i in range(5)]
+    created = thread_repo.create_many(db_session, objs_in=threads_in, batch_size=2)
+
+    assert [t.name for t in created] == [f"Bulk Thread {i}" for i in range(5)]
+    assert all(t.id is not None and t.created_at is not None for t in created)
+    assert len({t.id for t in created}) == 5
+
+def test_get_threads_by_user_id_with_messages(db_session):
+    from app.src.services.user import user_service
+    from app.src.services.chat_message import chat_message_service
+    from app.src.schema import UserCreate, ChatMessageCreate
+    from app.src.schema.chat_message import MessageRole
+
+    user = user_service.create_user(db_session, UserCreate(username="test_user_thread_msgs", password="test_password"))
+    for name in ["Loaded Thread 1", "Loaded Thread 2"]:
+        created_thread = thread_service.create(db_session, ThreadCreate(name=name, user_id=user.id))
+        for content in ["First", "Second"]:
+            chat_message_service.create_message(
+                db_session,
+                thread_id=created_thread.id,
+                message=ChatMessageCreate(thread_id=created_thread.id, role=MessageRole.USER, content=f"{name} {content}")
+            )
+    db_session.expire_all()
+
+    without_messages = thread_service.get_by_user_id(db_session, user_id=user.id)
+    assert all(t.messages is None for t in without_messages)
+
+    with_messages = thread_service.get_by_user_id(db_session, user_id=user.id, include_messages=True)
+    for thread in with_messages:
+        assert [m.content for m in thread.messages] == [f"{thread.name} First", f"{thread.name} Second"]
+
+def test_get_threads_by_user_id_after_id(db_session):
+    from datetime import datetime
+    from app.src.services.user import user_service
+    from app.src.schema import UserCreate
+
+    user = user_service.create_user(db_session, UserCreate(username="test_user_thread_keyset", password="test_password"))
+    created = [thread_service.create(db_session, ThreadCreate(name=f"Keyset Thread {i}", user_id=user.id)) for i in range(5)]
+    # Two threads created at the same moment: id decides their order
+    same_moment = datetime(2024, 1, 1)
+    for thread in created[1:3]:
+        db_session.get(Thread, thread.id).created_at = same_moment
+    db_session.commit()
+
+    all_threads = thread_service.get_by_user_id(db_session, user_id=user.id)
+    pages, after_id = [], None
+    while True:
+        page = thread_service.get_by_user_id(db_session, user_id=user.id, limit=2, after_id=after_id)
+        if not page:
+            break
+        pages.extend(page)
+        after_id = page[-1].id
+
+    assert [t.id for t in pages] == [t.id for t in all_threads]
+    assert len(pages) == 5
+
+def test_repository_update_thread(db_session):
+    from app.src.repositories import thread_repo
+
+    db_thread = thread_repo.create(db_session, obj_in=ThreadCreate(name="Repo Thread", allowed_sources=["a"]))
+    updated = thread_repo.update(db_session, db_obj=db_thread, obj_in=ThreadUpdate(name="Repo Thread Renamed"))
+
+    assert updated.name == "Repo Thread Renamed"
+    assert updated.allowed_sources == ["a"]
\ No newline at end of file
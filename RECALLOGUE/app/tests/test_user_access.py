@@ -79,4 +79,38 @@ def test_get_user_by_username(db_session):
     
     assert retrieved_user is not None
     assert retrieved_user.username == "testuser2"
-    assert retrieved_user.group_id == created_group.id
\ No newline at end of file
+    assert retrieved_user.group_id == created_group.id
+
+def test_update_user_only_changes_set_fields(db_session):
+    from app.src.schema import UserUpdate
+
+    created_group = access_group_service.create_access_group(db_session, AccessGroupCreate(name="Editors"))
+    user_in = UserCreate(username="testuser3", password="testpassword3", group_id=created_group.id)
+    created_user = user_service.create_user(db_session, user_in)
+
+    # Renaming leaves the group alone
+    updated_user = user_service.update_user(db_session, created_user.id, UserUpdate(username="testuser3_renamed"))
+    assert updated_user.username == "testuser3_renamed"
+    assert updated_user.group_id == created_group.id
+
+    # group_id=0 removes the user from their group
+    updated_user = user_service.update_user(
+        db_session, created_user.id, UserUpdate(username="testuser3_renamed", group_id=0)
+    )
+    assert updated_user.group_id is None
+
+def test_update_access_group_ignores_null_name(db_session):
+    from app.src.schema import AccessGroupUpdate
+
+    created_group = access_group_service.create_access_group(db_session, AccessGroupCreate(name="Reviewers"))
+
+    # name is NOT NULL: an explicit null leaves it as it was instead of failing the update
+    updated_group = access_group_service.update_access_group(
+        db_session, created_group.id, AccessGroupUpdate(name=None)
+    )
+    assert updated_group.name == "Reviewers"
+
+    updated_group = access_group_service.update_access_group(
+        db_session, created_group.id, AccessGroupUpdate(name="Reviewers 2")
+    )
+    assert updated_group.name == "Reviewers 2"
\ No newline at end of file